@@ -1,60 +1,98 @@
 # agents/agent_langchain.py
 
+import os
+from typing import Tuple
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain.tools import Tool
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_openai import ChatOpenAI
-from langchain import hub
+from langchain.prompts import PromptTemplate
 from agents.agent_llamaindex import LlamaIndexAgent
 
+PROMPT_PATH = os.path.join(os.path.dirname(__file__), "prompts", "react.txt")
+
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+# AgentExecutor's output when max_iterations runs out
+AGENT_STOPPED_PREFIX = "Agent stopped due to"
+
+
+def load_react_prompt() -> PromptTemplate:
+    with open(PROMPT_PATH, encoding="utf-8") as f:
+        return PromptTemplate.from_template(f.read())
+
+
+class AgentStreamHandler(BaseCallbackHandler):
+    """Forwards agent steps and final-answer tokens to an emit callback"""
+
+    def __init__(self, emit):
+        self.emit = emit
+        self._buffer = ""
+        self._in_final_answer = False
+
+    def on_llm_start(self, *args, **kwargs):
+        self._buffer = ""
+        self._in_final_answer = False
+
+    def on_chat_model_start(self, *args, **kwargs):
+        self.on_llm_start()
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        if self._in_final_answer:
+            self.emit({"type": "token", "content": token})
+            return
+
+        # Everything before "Final Answer:" is ReAct reasoning, not answer text
+        self._buffer += token
+        marker_at = self._buffer.find(FINAL_ANSWER_MARKER)
+        if marker_at != -1:
+            self._in_final_answer = True
+            remainder = self._buffer[marker_at + len(FINAL_ANSWER_MARKER):].lstrip()
+            if remainder:
+                self.emit({"type": "token", "content": remainder})
+
+    def on_agent_action(self, action, **kwargs):
+        self.emit({"type": "step", "tool": action.tool, "input": str(action.tool_input)})
+
+    def on_tool_end(self, output, **kwargs):
+        self.emit({"type": "observation", "content": str(output)})
+
 
 class LangchainAgent:
-    def __init__(self):
+    def __init__(self, llm=None, llama_agent=None):
         # Create an instance of the LlamaIndex agent
-        self.llama_agent = LlamaIndexAgent()
+        self.llama_agent = llama_agent or LlamaIndexAgent()
+
+        # ReAct prompt (hwchase17/react) bundled locally, no network call at construction
+        self.prompt = load_react_prompt()
 
-        # Create LangChain tool that calls query_knowledge
+        # streaming=True makes every LLM call report tokens to the callbacks
+        self.llm = llm or ChatOpenAI(temperature=0.1, model="gpt-3.5-turbo", streaming=True)
+
+    def _build_executor(self, llama_agent, failures: list) -> AgentExecutor:
+        def search(question: str) -> str:
+            try:
+                return llama_agent.search(question)
+            except Exception as e:
+                print(f"[LlamaIndexAgent] Error querying: {e}")
+                # The agent sees the error, the caller learns the answer is not a real one
+                failures.append(e)
+                return f"I encountered an error while searching for information: {str(e)}"
+
+        # Create LangChain tool that calls the knowledge search
         tools = [
             Tool(
                 name="LlamaIndex_Knowledge_Search",
-                func=self.llama_agent.query_knowledge,
+                func=search,
                 description="Useful when you need to find information in documents about people, company information, or any stored knowledge",
             )
         ]
 
-        # Get the react prompt from LangChain hub
-        try:
-            prompt = hub.pull("hwchase17/react")
-        except:
-            # Fallback prompt if hub is not available
-            from langchain.prompts import PromptTemplate
-            prompt = PromptTemplate.from_template("""
-            Answer the following questions as best you can. You have access to the following tools:
-
-            {tools}
-
-            Use the following format:
-
-            Question: the input question you must answer
-            Thought: you should always think about what to do
-            Action: the action to take, should be one of [{tool_names}]
-            Action Input: the input to the action
-            Observation: the result of the action
-            ... (this Thought/Action/Action Input/Observation can repeat N times)
-            Thought: I now know the final answer
-            Final Answer: the final answer to the original input question
-
-            Begin!
-
-            Question: {input}
-            Thought:{agent_scratchpad}
-            """)
-
         # Create LangChain agent with newer API
-        llm = ChatOpenAI(temperature=0.1, model="gpt-3.5-turbo")
-        agent = create_react_agent(llm, tools, prompt)
+        agent = create_react_agent(self.llm, tools, self.prompt)
         
         # Create agent executor
-        self.agent_executor = AgentExecutor(
+        return AgentExecutor(
             agent=agent,
             tools=tools,
             verbose=True,
@@ -62,11 +100,45 @@ class LangchainAgent:
             max_iterations=3
         )
 
-    def run(self, question: str) -> str:
+    @staticmethod
+    def format_history(history) -> str:
+        return "\n".join(
+            f"{'User' if message['role'] == 'user' else 'Assistant'}: {message['content']}"
+            for message in history or []
+        )
+
+    @staticmethod
+    def _fallback(llama_agent, question: str) -> str:
+        # Direct LlamaIndex query, without the conversation
+        return llama_agent.query_knowledge(question)
+
+    def _invoke(self, question: str, llama_agent, history, callbacks=None) -> Tuple[str, bool]:
+        """
+        Returns the answer and whether it is a real one. Error messages, the
+        iteration-limit message and fallback answers are False: they must not be cached.
+        """
+        llama_agent = llama_agent or self.llama_agent
+        # Building an executor is cheap (no network), each call gets its own failure log
+        failures = []
+        executor = self._build_executor(llama_agent, failures)
         try:
-            result = self.agent_executor.invoke({"input": question})
-            return result.get("output", "I couldn't find an answer to your question.")
+            result = executor.invoke(
+                {"input": question, "chat_history": self.format_history(history)},
+                config={"callbacks": callbacks} if callbacks else None
+            )
         except Exception as e:
             print(f"Error in LangChain agent: {e}")
-            # Fallback to direct LlamaIndex query
-            return self.llama_agent.query_knowledge(question)
+            return self._fallback(llama_agent, question), False
+        answer = result.get("output")
+        if not answer or answer.startswith(AGENT_STOPPED_PREFIX):
+            return answer or "I couldn't find an answer to your question.", False
+        return answer, not failures
+
+    def run(self, question: str, llama_agent=None, history=None) -> Tuple[str, bool]:
+        return self._invoke(question, llama_agent, history)
+
+    def stream(self, question: str, emit, llama_agent=None, history=None) -> Tuple[str, bool]:
+        """Same as run, but reports intermediate steps and answer tokens through emit"""
+        answer, ok = self._invoke(question, llama_agent, history, callbacks=[AgentStreamHandler(emit)])
+        emit({"type": "final", "content": answer})
+        return answer, ok
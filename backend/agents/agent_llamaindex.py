@@ -1,79 +1,324 @@
+import hashlib
+import json
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY not found! Check your .env file")
+# Set to an empty string to disable the on-disk embedding cache
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "indexes/embedding_cache")
+# Query embeddings are only cached in memory, this many per process
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+# Set to an empty string to parse every file again on every index
+PARSED_TEXT_CACHE_DIR = os.getenv("PARSED_TEXT_CACHE_DIR", "indexes/parsed_text")
+# "simple" for the JSON SimpleVectorStore, "mmap" for the memory-mapped float32 store
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "mmap")
+# "exact" brute-force scan or "ivf" approximate search, only used by the mmap backend
+VECTOR_RETRIEVAL_MODE = os.getenv("VECTOR_RETRIEVAL_MODE", "exact")
+ANN_N_PROBE = int(os.getenv("ANN_N_PROBE", "8"))
 
 from llama_index.core import (
+    Document,
+    QueryBundle,
     VectorStoreIndex,
     StorageContext,
     load_index_from_storage,
     Settings,
     SimpleDirectoryReader
 )
+from llama_index.core.node_parser import SentenceSplitter
 from llama_index.llms.openai import OpenAI
 from llama_index.embeddings.openai import OpenAIEmbedding
+from agents.embedding_cache import CachedEmbedding
+from agents.mmap_vector_store import MmapVectorStore
+from agents.parsed_text_cache import FILE_METADATA_KEYS, get_parsed_text_cache
+
+MANIFEST_FILE = "file_manifest.json"
+NO_DOCUMENTS_MESSAGE = "No documents available yet. Please upload documents first."
+
+
+def file_content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
 
 class LlamaIndexAgent:
-    def __init__(self, rebuild_index=False):
-        # Configure the LLM and embeddings
-        Settings.llm = OpenAI(api_key=OPENAI_API_KEY, model="gpt-3.5-turbo", temperature=0.1)
-        Settings.embed_model = OpenAIEmbedding(api_key=OPENAI_API_KEY)
-        Settings.chunk_size = 1024
-        Settings.chunk_overlap = 20
+    def __init__(self, rebuild_index=False, docs_dir="data/people_docs", index_dir="indexes",
+                 llm=None, embed_model=None, vector_store_backend=None, retrieval_mode=None):
+        if not OPENAI_API_KEY and (llm is None or embed_model is None):
+            raise ValueError("OPENAI_API_KEY not found! Check your .env file")
 
-        self.index_dir = "indexes"
-        self.docs_dir = "data/people_docs"
+        # Configure the LLM and embeddings. Per-user agents get the shared ones passed
+        # in, the process-wide Settings are only set by an agent that creates its own
+        owns_models = llm is None or embed_model is None
+        llm = llm or OpenAI(api_key=OPENAI_API_KEY, model="gpt-3.5-turbo", temperature=0.1)
+        embed_model = embed_model or OpenAIEmbedding(api_key=OPENAI_API_KEY)
+        if EMBEDDING_CACHE_DIR and not isinstance(embed_model, CachedEmbedding):
+            # Unchanged chunks are never sent to the embedding API twice, including on rebuilds
+            embed_model = CachedEmbedding(
+                embed_model, cache_dir=EMBEDDING_CACHE_DIR, query_cache_size=QUERY_EMBEDDING_CACHE_SIZE
+            )
+        if owns_models:
+            Settings.llm = llm
+            Settings.embed_model = embed_model
+        self.llm = llm
+        self.embed_model = embed_model
+        self.node_parser = SentenceSplitter(chunk_size=1024, chunk_overlap=20)
+
+        self.index_dir = index_dir
+        self.docs_dir = docs_dir
+        self.vector_store_backend = vector_store_backend or VECTOR_STORE_BACKEND
+        self.retrieval_mode = retrieval_mode or VECTOR_RETRIEVAL_MODE
+        self.manifest_path = os.path.join(self.index_dir, MANIFEST_FILE)
+        # filename -> {"hash": content hash, "doc_ids": [...]} for every indexed file
+        self.manifest = {}
+        self._lock = threading.RLock()
+        self.parsed_cache = get_parsed_text_cache(PARSED_TEXT_CACHE_DIR) if PARSED_TEXT_CACHE_DIR else None
 
         # Create directories if they don't exist
         os.makedirs(self.index_dir, exist_ok=True)
         os.makedirs(self.docs_dir, exist_ok=True)
 
-        if rebuild_index or not os.path.exists(os.path.join(self.index_dir, "index_store.json")):
+        has_index = os.path.exists(os.path.join(self.index_dir, "index_store.json"))
+        has_manifest = os.path.exists(self.manifest_path)
+        if rebuild_index or not has_index or not has_manifest:
+            # Indexes persisted before the manifest existed are rebuilt once
             print("[LlamaIndexAgent] Building index from documents...")
             try:
-                documents = SimpleDirectoryReader(self.docs_dir).load_data()
-                if not documents:
-                    print("[LlamaIndexAgent] No documents found, creating empty index")
-                    # Create a simple document if none exist
-                    from llama_index.core import Document
-                    documents = [Document(text="No documents available yet. Please add documents to the data/people_docs directory.")]
-                
-                self.index = VectorStoreIndex.from_documents(documents)
-                self.index.storage_context.persist(persist_dir=self.index_dir)
-                print(f"[LlamaIndexAgent] Index created with {len(documents)} documents")
+                self.index = self._empty_index()
+                self.sync()
+                print(f"[LlamaIndexAgent] Index created with {len(self.manifest)} files")
             except Exception as e:
                 print(f"[LlamaIndexAgent] Error building index: {e}")
                 # Create a fallback empty index
-                from llama_index.core import Document
-                documents = [Document(text="Error loading documents. Please check your document directory.")]
-                self.index = VectorStoreIndex.from_documents(documents)
+                self.index = self._empty_index()
+                self.manifest = {}
         else:
             print("[LlamaIndexAgent] Loading existing index...")
             try:
-                storage_context = StorageContext.from_defaults(persist_dir=self.index_dir)
-                self.index = load_index_from_storage(storage_context)
+                storage_context = self._load_storage_context()
+                self.index = load_index_from_storage(
+                    storage_context, embed_model=self.embed_model, transformations=[self.node_parser]
+                )
+                with open(self.manifest_path) as f:
+                    self.manifest = json.load(f)
+                # Pick up files added or removed while the index was not loaded
+                self.sync()
                 print("[LlamaIndexAgent] Index loaded successfully")
             except Exception as e:
                 print(f"[LlamaIndexAgent] Error loading index: {e}")
                 # Rebuild if loading fails
-                self.__init__(rebuild_index=True)
+                self.__init__(rebuild_index=True, docs_dir=docs_dir, index_dir=index_dir,
+                              llm=llm, embed_model=embed_model, vector_store_backend=vector_store_backend,
+                              retrieval_mode=retrieval_mode)
                 return
 
-        self.query_engine = self.index.as_query_engine(
+        self.query_engine = self._make_query_engine()
+
+    def _empty_index(self) -> VectorStoreIndex:
+        return VectorStoreIndex.from_documents(
+            [],
+            storage_context=self._new_storage_context(),
+            embed_model=self.embed_model,
+            transformations=[self.node_parser]
+        )
+
+    def _make_query_engine(self):
+        return self.index.as_query_engine(
+            llm=self.llm,
             similarity_top_k=3,
             response_mode="compact"
         )
 
-    def query_knowledge(self, question: str) -> str:
+    def _new_storage_context(self) -> StorageContext:
+        if self.vector_store_backend == "mmap":
+            vector_store = MmapVectorStore(retrieval_mode=self.retrieval_mode, ann_n_probe=ANN_N_PROBE)
+            return StorageContext.from_defaults(vector_store=vector_store)
+        return StorageContext.from_defaults()
+
+    def _load_storage_context(self) -> StorageContext:
+        if self.vector_store_backend == "mmap":
+            # Raises if the index was persisted with another backend, which triggers a rebuild
+            vector_store = MmapVectorStore.from_persist_dir(
+                self.index_dir, retrieval_mode=self.retrieval_mode, ann_n_probe=ANN_N_PROBE
+            )
+            return StorageContext.from_defaults(persist_dir=self.index_dir, vector_store=vector_store)
+        return StorageContext.from_defaults(persist_dir=self.index_dir)
+
+    def _persist(self):
+        self.index.storage_context.persist(persist_dir=self.index_dir)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _delete_docs(self, filename: str):
+        entry = self.manifest.pop(filename, None)
+        if entry:
+            for doc_id in entry["doc_ids"]:
+                self.index.delete_ref_doc(doc_id, delete_from_docstore=True)
+
+    def _load_documents(self, filename: str, content_hash: str):
+        """Parse a file, or reuse the text parsed from identical content uploaded by anyone"""
+        path = os.path.join(self.docs_dir, filename)
+        parsed = self.parsed_cache.get(content_hash) if self.parsed_cache else None
+        if parsed is None:
+            parsed = [
+                {
+                    "text": document.text,
+                    "metadata": {k: v for k, v in document.metadata.items() if k not in FILE_METADATA_KEYS}
+                }
+                for document in SimpleDirectoryReader(input_files=[path]).load_data()
+            ]
+            if self.parsed_cache:
+                self.parsed_cache.put(content_hash, parsed)
+
+        documents = []
+        for entry in parsed:
+            metadata = {**entry["metadata"], "file_name": filename, "file_path": path}
+            documents.append(Document(
+                text=entry["text"],
+                metadata=metadata,
+                # Embed the content only, so a chunk's embedding (and its cache key) is the
+                # same for every user who uploaded the file, whatever its name or path
+                excluded_embed_metadata_keys=list(metadata),
+                excluded_llm_metadata_keys=["file_path"]
+            ))
+        return documents
+
+    def _insert_file(self, filename: str, content_hash: str):
+        documents = self._load_documents(filename, content_hash)
+        doc_ids = []
+        for i, document in enumerate(documents):
+            # Stable ids derived from the content, so a re-upload of the same bytes is a no-op
+            document.id_ = f"{filename}#{content_hash[:16]}#{i}"
+            self.index.insert(document)
+            doc_ids.append(document.id_)
+        self.manifest[filename] = {"hash": content_hash, "doc_ids": doc_ids}
+
+    def _apply(self, filename: str, content_hash: str = None) -> bool:
+        """Bring one file's nodes in line with the docs directory, returns True if anything changed"""
+        path = os.path.join(self.docs_dir, filename)
+        if not os.path.isfile(path):
+            if filename not in self.manifest:
+                return False
+            self._delete_docs(filename)
+            print(f"[LlamaIndexAgent] Removed {filename} from index")
+            return True
+
+        content_hash = content_hash or file_content_hash(path)
+        entry = self.manifest.get(filename)
+        if entry and entry["hash"] == content_hash:
+            return False
+
+        self._delete_docs(filename)
+        self._insert_file(filename, content_hash)
+        print(f"[LlamaIndexAgent] Indexed {filename}")
+        return True
+
+    def upsert_file(self, filename: str, content_hash: str = None):
+        """
+        Embed only the given file, replacing its previous nodes if the content changed.
+        content_hash may be passed when the caller already hashed the file.
+        """
+        with self._lock:
+            if self._apply(filename, content_hash):
+                self._persist()
+        self._retrain_ann()
+
+    def remove_file(self, filename: str):
+        """Drop the nodes of a file that was deleted from the docs directory"""
+        with self._lock:
+            if self._apply(filename):
+                self._persist()
+        self._retrain_ann()
+
+    def _retrain_ann(self):
+        """
+        Retrain stale IVF lists after a write. Training runs without the lock,
+        queries keep using the old lists plus an exact scan of the new rows.
+        """
+        vector_store = self.index.vector_store
+        if not isinstance(vector_store, MmapVectorStore):
+            return
+        with self._lock:
+            if not vector_store.ivf_stale():
+                return
+            snapshot = vector_store.ivf_snapshot()
+        ivf = vector_store.train_ivf(snapshot)
+        with self._lock:
+            # The index may have been rebuilt meanwhile, then the lists belong to a dropped store
+            if self.index.vector_store is vector_store:
+                vector_store.install_ivf(snapshot, ivf)
+
+    def rebuild(self):
+        """Drop every node and index the docs directory from scratch, in place"""
+        with self._lock:
+            self.index = self._empty_index()
+            self.manifest = {}
+            self.sync()
+            self._persist()
+            self.query_engine = self._make_query_engine()
+
+    def sync(self):
+        """Apply every difference between the docs directory and the manifest"""
+        with self._lock:
+            on_disk = {
+                name for name in os.listdir(self.docs_dir)
+                if os.path.isfile(os.path.join(self.docs_dir, name))
+            }
+            changed = False
+            for filename in sorted(on_disk | set(self.manifest)):
+                try:
+                    changed = self._apply(filename) or changed
+                except Exception as e:
+                    print(f"[LlamaIndexAgent] Skipping {filename}: {e}")
+            if changed or not os.path.exists(self.manifest_path):
+                self._persist()
+        self._retrain_ann()
+
+    @property
+    def has_documents(self) -> bool:
+        return bool(self.manifest)
+
+    def estimate_memory(self) -> int:
+        """Approximate resident bytes of this index, used for the registry memory budget"""
+        vector_store = self.index.vector_store
+        if isinstance(vector_store, MmapVectorStore):
+            vector_bytes = vector_store.estimate_memory()
+        else:
+            # SimpleVectorStore keeps Python lists, roughly 32 bytes per float
+            vector_bytes = sum(len(vector) for vector in vector_store.data.embedding_dict.values()) * 32
+        # Node text and metadata in the docstore, about twice the raw file size
+        text_bytes = 0
+        for filename in self.manifest:
+            path = os.path.join(self.docs_dir, filename)
+            if os.path.isfile(path):
+                text_bytes += os.path.getsize(path) * 2
+        return vector_bytes + text_bytes
+
+    def search(self, question: str) -> str:
+        """Answer from the indexed documents, raises if retrieval or the LLM call fails"""
         print(f"[LlamaIndexAgent] Question: {question}")
+        if not self.manifest:
+            return NO_DOCUMENTS_MESSAGE
+        # Embedding and the LLM answer run unlocked, only the lookup in the
+        # docstore and vector store has to exclude concurrent writes
+        query_bundle = QueryBundle(question, embedding=self.embed_model.get_query_embedding(question))
+        with self._lock:
+            query_engine = self.query_engine
+            nodes = query_engine.retrieve(query_bundle)
+        answer = str(query_engine.synthesize(query_bundle, nodes))
+        print(f"[LlamaIndexAgent] Answer: {answer}")
+        return answer
+
+    def query_knowledge(self, question: str) -> str:
         try:
-            response = self.query_engine.query(question)
-            answer = str(response)
-            print(f"[LlamaIndexAgent] Answer: {answer}")
-            return answer
+            return self.search(question)
         except Exception as e:
             print(f"[LlamaIndexAgent] Error querying: {e}")
             return f"I encountered an error while searching for information: {str(e)}"
@@ -85,4 +330,4 @@ if __name__ == "__main__":
         response = agent.query_knowledge("What is this company about?")
         print(f"[LlamaIndexAgent] Response: {response}")
     except Exception as e:
-        print(f"[LlamaIndexAgent] Test failed: {e}")
\ No newline at end of file
+        print(f"[LlamaIndexAgent] Test failed: {e}")
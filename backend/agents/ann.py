@@ -0,0 +1,94 @@
+# agents/ann.py
+
+import os
+from typing import Optional
+
+import numpy as np
+
+# Rows are assigned to centroids in blocks to bound temporary memory
+ASSIGN_BLOCK_ROWS = 65536
+
+
+def _assign(matrix, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + ASSIGN_BLOCK_ROWS])
+        labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+class IVFIndex:
+    """
+    Inverted-file index over unit-normalised vectors.
+
+    Rows are clustered with spherical k-means; a query scores the centroids,
+    then only the rows of the n_probe closest lists. Lists are stored CSR style:
+    row ids grouped by list in `order`, list i spans order[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray, rows: int):
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        # Number of rows covered when the index was built, later rows are scanned exactly
+        self.rows = rows
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, matrix, n_lists: Optional[int] = None, iterations: int = 10,
+              sample_per_list: int = 256, seed: int = 0) -> "IVFIndex":
+        rows = len(matrix)
+        n_lists = max(1, min(n_lists or int(np.sqrt(rows)), rows))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(rows, n_lists * sample_per_list)
+        sample = np.asarray(matrix[np.sort(rng.choice(rows, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty lists from random sample rows
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        labels = _assign(matrix, centroids)
+        order = np.argsort(labels, kind="stable").astype(np.int64)
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=offsets[1:])
+        return cls(centroids, order, offsets, rows)
+
+    def candidates(self, query_vector: np.ndarray, n_probe: int) -> np.ndarray:
+        """Row ids in the n_probe lists closest to the query"""
+        n_probe = max(1, min(n_probe, self.n_lists))
+        centroid_scores = self.centroids @ query_vector
+        lists = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        return np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+
+    def save(self, path: str):
+        tmp_path = os.path.join(path, "ivf.tmp.npz")
+        np.savez(tmp_path, centroids=self.centroids, order=self.order, offsets=self.offsets,
+                 rows=np.array(self.rows))
+        os.replace(tmp_path, os.path.join(path, "ivf.npz"))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IVFIndex"]:
+        file_path = os.path.join(path, "ivf.npz")
+        if not os.path.exists(file_path):
+            return None
+        with np.load(file_path) as data:
+            return cls(data["centroids"], data["order"], data["offsets"], int(data["rows"]))
+
+    @staticmethod
+    def remove(path: str):
+        file_path = os.path.join(path, "ivf.npz")
+        if os.path.exists(file_path):
+            os.remove(file_path)
@@ -0,0 +1,261 @@
+# agents/embedding_cache.py
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import PrivateAttr
+
+DIGEST_SIZE = 32
+
+
+def text_digest(text: str, namespace: bytes = b"t") -> bytes:
+    return hashlib.sha256(namespace + b"\0" + text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Append-only on-disk embedding cache for one embedding model.
+
+    vectors.f32 holds contiguous float32 rows and is memory-mapped for reads,
+    keys.bin holds the 32-byte sha256 digest of the text for each row, in order.
+    A row is only visible once its key is written, so a crash mid-append never
+    exposes a partial vector.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in model_name)
+        self.path = os.path.join(cache_dir, safe_name)
+        os.makedirs(self.path, exist_ok=True)
+        self.model_name = model_name
+        self._vectors_path = os.path.join(self.path, "vectors.f32")
+        self._keys_path = os.path.join(self.path, "keys.bin")
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self._lock = threading.Lock()
+        self._rows: Dict[bytes, int] = {}
+        self._keys_size = 0
+        self._matrix = None
+        self.dim: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                self.dim = json.load(f)["dim"]
+        self._load_new_keys()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _load_new_keys(self):
+        """Read keys appended since the last load, possibly by another process"""
+        if not os.path.exists(self._keys_path):
+            return
+        size = os.path.getsize(self._keys_path)
+        size -= size % DIGEST_SIZE
+        if size <= self._keys_size:
+            return
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_size)
+            data = f.read(size - self._keys_size)
+        row = self._keys_size // DIGEST_SIZE
+        for offset in range(0, len(data), DIGEST_SIZE):
+            self._rows.setdefault(data[offset:offset + DIGEST_SIZE], row)
+            row += 1
+        self._keys_size = size
+        self._matrix = None
+
+    def _get_matrix(self):
+        if self._matrix is None and self._keys_size:
+            rows = self._keys_size // DIGEST_SIZE
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._matrix
+
+    def get_many(self, digests: List[bytes]) -> List[Optional[List[float]]]:
+        with self._lock:
+            if any(digest not in self._rows for digest in digests):
+                self._load_new_keys()
+            matrix = self._get_matrix()
+            results = []
+            for digest in digests:
+                row = self._rows.get(digest)
+                if row is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    results.append(matrix[row].tolist())
+            return results
+
+    def put_many(self, digests: List[bytes], embeddings: List[List[float]]):
+        if not digests:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock, open(os.path.join(self.path, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._load_new_keys()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                with open(self._meta_path, "w") as f:
+                    json.dump({"model": self.model_name, "dim": self.dim}, f)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match cache dimension {self.dim}")
+
+            fresh = [i for i, digest in enumerate(digests) if digest not in self._rows]
+            if not fresh:
+                return
+            rows = self._keys_size // DIGEST_SIZE
+            with open(self._vectors_path, "ab") as f:
+                # Drop vectors left behind by an append that never wrote its keys
+                f.truncate(rows * self.dim * 4)
+                f.write(vectors[fresh].tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(digests[i] for i in fresh))
+            self._load_new_keys()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._rows), "hits": self.hits, "misses": self.misses}
+
+
+_caches: Dict[tuple, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(cache_dir: str, model_name: str) -> EmbeddingCache:
+    """One cache object per (directory, model) in this process"""
+    key = (os.path.abspath(cache_dir), model_name)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(cache_dir, model_name)
+        return _caches[key]
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Embedding model wrapper that consults the on-disk cache before calling the real model.
+
+    Only document chunks go to disk. Query embeddings are user questions, so
+    they are kept in a bounded in-memory LRU and never persisted.
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+    _queries: OrderedDict = PrivateAttr()
+    _queries_lock: threading.Lock = PrivateAttr()
+    _query_cache_size: int = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, cache_dir: str, query_cache_size: int = 1024, **kwargs):
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs
+        )
+        self._inner = inner
+        self._cache = get_embedding_cache(cache_dir, inner.model_name)
+        self._queries = OrderedDict()
+        self._queries_lock = threading.Lock()
+        self._query_cache_size = query_cache_size
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
+    def _lookup(self, texts: List[str], namespace: bytes):
+        digests = [text_digest(text, namespace) for text in texts]
+        return digests, self._cache.get_many(digests)
+
+    def _fill(self, digests, cached, computed):
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        self._cache.put_many([digests[i] for i in missing], computed)
+        for i, vector in zip(missing, computed):
+            cached[i] = vector
+        return cached
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        digests, cached = self._lookup(texts, b"t")
+        missing_texts = [text for text, vector in zip(texts, cached) if vector is None]
+        if not missing_texts:
+            return cached
+        computed = self._inner.get_text_embedding_batch(missing_texts)
+        return self._fill(digests, cached, computed)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def _cached_query(self, query: str) -> Optional[List[float]]:
+        with self._queries_lock:
+            vector = self._queries.get(query)
+            if vector is not None:
+                self._queries.move_to_end(query)
+            return vector
+
+    def _remember_query(self, query: str, vector: List[float]) -> List[float]:
+        if self._query_cache_size > 0:
+            with self._queries_lock:
+                self._queries[query] = vector
+                self._queries.move_to_end(query)
+                while len(self._queries) > self._query_cache_size:
+                    self._queries.popitem(last=False)
+        return vector
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        vector = self._cached_query(query)
+        if vector is not None:
+            return vector
+        return self._remember_query(query, self._inner.get_query_embedding(query))
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        digests, cached = self._lookup(texts, b"t")
+        missing_texts = [text for text, vector in zip(texts, cached) if vector is None]
+        if not missing_texts:
+            return cached
+        computed = await self._inner.aget_text_embedding_batch(missing_texts)
+        return self._fill(digests, cached, computed)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        vector = self._cached_query(query)
+        if vector is not None:
+            return vector
+        return self._remember_query(query, await self._inner.aget_query_embedding(query))
+
+
+class DeterministicEmbedding(BaseEmbedding):
+    """Offline fake embedder: the vector is a pure function of the text. Counts calls."""
+
+    embed_dim: int = 256
+    calls: int = 0
+
+    def __init__(self, embed_dim: int = 256, **kwargs):
+        super().__init__(model_name=f"deterministic-{embed_dim}", embed_dim=embed_dim, **kwargs)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "DeterministicEmbedding"
+
+    def _embed(self, text: str) -> List[float]:
+        self.calls += 1
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.embed_dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
@@ -0,0 +1,122 @@
+# agents/index_registry.py
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable
+
+from agents.agent_llamaindex import LlamaIndexAgent
+
+
+class _Slot:
+    """A user's agent plus the leases held on it, agent is None until built"""
+    __slots__ = ("agent", "size", "pins", "build_lock")
+
+    def __init__(self):
+        self.agent = None
+        self.size = 0
+        self.pins = 0
+        self.build_lock = threading.Lock()
+
+
+class UserIndexRegistry:
+    """
+    Lazily built per-user LlamaIndexAgents, least recently used users are
+    evicted once the estimated memory of resident indexes exceeds max_bytes.
+    The most recently used index is always kept, even if it alone is over budget.
+
+    Agents are only handed out through lease(). A leased agent is never
+    evicted, so there is at most one agent per index directory and two agents
+    never write the same files.
+    """
+
+    def __init__(self, factory: Callable[[str], LlamaIndexAgent], max_bytes: int):
+        self.factory = factory
+        self.max_bytes = max_bytes
+        # Every user that is resident, leased or being built
+        self._slots = {}
+        # Resident users in least recently used order
+        self._lru = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._lru
+
+    @contextmanager
+    def lease(self, username: str):
+        """Yield the user's agent, building it if needed, pinned until the block exits"""
+        with self._lock:
+            slot = self._slots.get(username)
+            if slot is None:
+                slot = self._slots[username] = _Slot()
+            slot.pins += 1
+            if username in self._lru:
+                self._lru.move_to_end(username)
+                self.hits += 1
+            else:
+                self.misses += 1
+        try:
+            if slot.agent is None:
+                # One build at a time per user, different users build in parallel
+                with slot.build_lock:
+                    if slot.agent is None:
+                        agent = self.factory(username)
+                        with self._lock:
+                            slot.agent = agent
+                            self._lru[username] = slot
+                        self.refresh(username)
+            yield slot.agent
+        finally:
+            with self._lock:
+                slot.pins -= 1
+                if not slot.pins and username not in self._lru:
+                    # The build failed, nothing to keep
+                    self._slots.pop(username, None)
+                self._evict()
+
+    def refresh(self, username: str):
+        """Re-estimate a user's index after it changed, may evict others"""
+        with self._lock:
+            slot = self._slots.get(username)
+            agent = slot.agent if slot is not None else None
+        if agent is None:
+            return
+        size = agent.estimate_memory()
+        with self._lock:
+            if username not in self._lru:
+                return
+            self._resident_bytes += size - slot.size
+            slot.size = size
+            self._lru.move_to_end(username)
+            self._evict()
+
+    def _evict(self):
+        # Never the most recently used user, never an agent somebody is using
+        for username in list(self._lru)[:-1]:
+            if self._resident_bytes <= self.max_bytes:
+                break
+            slot = self._lru[username]
+            if slot.pins:
+                continue
+            del self._lru[username]
+            del self._slots[username]
+            self._resident_bytes -= slot.size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "resident_users": len(self._lru),
+                "leased_users": sum(1 for slot in self._slots.values() if slot.pins),
+                "resident_bytes": self._resident_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
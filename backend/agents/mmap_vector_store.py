@@ -0,0 +1,330 @@
+# agents/mmap_vector_store.py
+
+import json
+import os
+from typing import Any, List, Optional
+
+import numpy as np
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+from pydantic import PrivateAttr
+
+from agents.ann import IVFIndex
+
+STORE_DIR_SUFFIX = "__vector_store_mmap"
+# Rewrite the vector file once this fraction of its rows are deleted
+COMPACT_DEAD_RATIO = 0.25
+# Retrain the IVF lists once rows added after training exceed this fraction
+IVF_STALE_RATIO = 0.1
+
+
+def _write_json_atomic(path: str, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class MmapVectorStore(BasePydanticVectorStore):
+    """
+    Vector store keeping unit-normalised embeddings in one contiguous float32
+    matrix on disk, memory-mapped on load. Top-k cosine similarity is a single
+    matrix-vector product.
+
+    Layout of the store directory:
+        vectors.f32  rows of float32, appended on persist, rewritten on compaction
+        ids.json     node id and ref doc id per row
+        alive.bin    one byte per row, 0 for deleted rows
+
+    Node text lives in the docstore (stores_text is False), like SimpleVectorStore.
+
+    retrieval_mode "exact" scans every row. "ivf" scans only the closest
+    ann_n_probe inverted lists (see agents/ann.py), trading recall for speed;
+    stores smaller than ann_min_rows are always scanned exactly. Queries never
+    train the lists: the owner retrains them after writes (ivf_snapshot,
+    train_ivf, install_ivf), meanwhile rows added since the last training are
+    scanned exactly and a store without lists is scanned in full.
+    """
+
+    stores_text: bool = False
+    retrieval_mode: str = "exact"
+    ann_n_probe: int = 8
+    ann_n_lists: Optional[int] = None
+    ann_min_rows: int = 2048
+
+    _dim: Optional[int] = PrivateAttr(default=None)
+    _base: Any = PrivateAttr(default=None)
+    _tail: List[np.ndarray] = PrivateAttr(default_factory=list)
+    _tail_matrix: Any = PrivateAttr(default=None)
+    _node_ids: List[str] = PrivateAttr(default_factory=list)
+    _ref_doc_ids: List[Optional[str]] = PrivateAttr(default_factory=list)
+    _alive: bytearray = PrivateAttr(default_factory=bytearray)
+    _persisted_rows: int = PrivateAttr(default=0)
+    _persisted_dir: Optional[str] = PrivateAttr(default=None)
+    _ivf: Optional[IVFIndex] = PrivateAttr(default=None)
+    # Bumped whenever compaction renumbers the rows, lists trained before are unusable
+    _generation: int = PrivateAttr(default=0)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "MmapVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    @staticmethod
+    def store_dir(persist_dir: str, namespace: str = "default") -> str:
+        return os.path.join(persist_dir, f"{namespace}{STORE_DIR_SUFFIX}")
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str, namespace: str = "default", **kwargs) -> "MmapVectorStore":
+        store = cls(**kwargs)
+        store._load(cls.store_dir(persist_dir, namespace))
+        return store
+
+    def _load(self, path: str):
+        with open(os.path.join(path, "ids.json")) as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "alive.bin"), "rb") as f:
+            alive = bytearray(f.read())
+
+        rows = len(meta["node_ids"])
+        self._dim = meta["dim"]
+        self._node_ids = meta["node_ids"]
+        self._ref_doc_ids = meta["ref_doc_ids"]
+        # Rows written after the last alive.bin update are live
+        self._alive = alive[:rows] + bytearray(b"\x01" * max(0, rows - len(alive)))
+        # The vector file may hold extra rows from an interrupted append, they are ignored
+        self._base = None
+        if rows and self._dim:
+            self._base = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r",
+                                   shape=(rows, self._dim))
+        self._tail = []
+        self._tail_matrix = None
+        self._persisted_rows = rows
+        self._persisted_dir = path
+        self._ivf = None
+        if self.retrieval_mode == "ivf":
+            ivf = IVFIndex.load(path)
+            if ivf is not None and ivf.rows <= rows:
+                self._ivf = ivf
+
+    def __len__(self) -> int:
+        return len(self._alive) - self._alive.count(0)
+
+    def estimate_memory(self) -> int:
+        """Approximate bytes held for this store, mapped pages counted as resident"""
+        rows = len(self._alive)
+        # float32 row, one alive byte and two id strings per row
+        return rows * ((self._dim or 0) * 4 + 1 + 120)
+
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+        vectors = np.asarray([node.get_embedding() for node in nodes], dtype=np.float32)
+        if self._dim is None:
+            self._dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self._dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self._dim}")
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._tail.append(vectors / norms)
+        self._tail_matrix = None
+        for node in nodes:
+            self._node_ids.append(node.node_id)
+            self._ref_doc_ids.append(node.ref_doc_id)
+            self._alive.append(1)
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        for row, row_ref_doc_id in enumerate(self._ref_doc_ids):
+            if row_ref_doc_id == ref_doc_id:
+                self._alive[row] = 0
+
+    def _get_tail_matrix(self):
+        if self._tail_matrix is None and self._tail:
+            self._tail_matrix = np.concatenate(self._tail) if len(self._tail) > 1 else self._tail[0]
+            self._tail = [self._tail_matrix]
+        return self._tail_matrix
+
+    def _row_mask(self, query: VectorStoreQuery) -> np.ndarray:
+        mask = np.frombuffer(self._alive, dtype=np.uint8) != 0
+        if query.node_ids:
+            wanted = set(query.node_ids)
+            mask &= np.fromiter((node_id in wanted for node_id in self._node_ids), dtype=bool, count=len(mask))
+        if query.doc_ids:
+            wanted = set(query.doc_ids)
+            mask &= np.fromiter((ref in wanted for ref in self._ref_doc_ids), dtype=bool, count=len(mask))
+        return mask
+
+    @staticmethod
+    def _normalize(query_embedding: List[float]) -> np.ndarray:
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        return query_vector / norm if norm else query_vector
+
+    def _matrix(self):
+        """All rows as one array, copies if there are unpersisted rows"""
+        tail = self._get_tail_matrix()
+        if self._base is None:
+            return tail
+        if tail is None:
+            return self._base
+        return np.concatenate([self._base, tail])
+
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        base_rows = len(self._base) if self._base is not None else 0
+        if not base_rows:
+            return self._get_tail_matrix()[rows]
+        in_base = rows < base_rows
+        if in_base.all():
+            return self._base[rows]
+        vectors = np.empty((len(rows), self._dim), dtype=np.float32)
+        vectors[in_base] = self._base[rows[in_base]]
+        vectors[~in_base] = self._get_tail_matrix()[rows[~in_base] - base_rows]
+        return vectors
+
+    def _usable_ivf(self) -> Optional[IVFIndex]:
+        if self.retrieval_mode != "ivf" or len(self._alive) < self.ann_min_rows:
+            return None
+        return self._ivf
+
+    def ivf_stale(self) -> bool:
+        """True when the inverted lists are missing or cover too few of the rows"""
+        rows = len(self._alive)
+        if self.retrieval_mode != "ivf" or rows < self.ann_min_rows:
+            return False
+        return self._ivf is None or rows - self._ivf.rows > IVF_STALE_RATIO * self._ivf.rows
+
+    def ivf_snapshot(self):
+        """The rows to train on, call with writes excluded"""
+        return self._generation, self._matrix()
+
+    def train_ivf(self, snapshot) -> IVFIndex:
+        """The slow k-means part, needs no lock: it only reads the snapshot"""
+        return IVFIndex.build(snapshot[1], n_lists=self.ann_n_lists)
+
+    def install_ivf(self, snapshot, ivf: IVFIndex) -> bool:
+        """Swap in lists trained on snapshot, call with writes excluded"""
+        if snapshot[0] != self._generation:
+            # Compacted while training, the row numbers no longer match
+            return False
+        if self._ivf is not None and self._ivf.rows >= ivf.rows:
+            return False
+        self._ivf = ivf
+        if self._persisted_dir is not None and ivf.rows <= self._persisted_rows:
+            ivf.save(self._persisted_dir)
+        return True
+
+    def retrain_ivf(self):
+        """Snapshot, train and install in one go, for single-threaded use"""
+        snapshot = self.ivf_snapshot()
+        self.install_ivf(snapshot, self.train_ivf(snapshot))
+
+    def scores(self, query_embedding: List[float]) -> np.ndarray:
+        """Cosine similarity of the query against every row, deleted rows included"""
+        query_vector = self._normalize(query_embedding)
+        parts = []
+        if self._base is not None:
+            parts.append(self._base @ query_vector)
+        tail = self._get_tail_matrix()
+        if tail is not None:
+            parts.append(tail @ query_vector)
+        if not parts:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.filters is not None:
+            raise ValueError("Metadata filters are not supported by MmapVectorStore")
+        if query.mode != VectorStoreQueryMode.DEFAULT:
+            raise ValueError(f"Query mode {query.mode} is not supported by MmapVectorStore")
+
+        if not self._alive:
+            return VectorStoreQueryResult(nodes=None, similarities=[], ids=[])
+
+        ivf = self._usable_ivf()
+        if ivf is None:
+            rows = None
+            scores = np.where(self._row_mask(query), self.scores(query.query_embedding), -np.inf)
+        else:
+            query_vector = self._normalize(query.query_embedding)
+            # Probed lists plus every row added since the lists were trained
+            rows = np.concatenate([
+                ivf.candidates(query_vector, self.ann_n_probe),
+                np.arange(ivf.rows, len(self._alive))
+            ])
+            rows = rows[self._row_mask(query)[rows]]
+            if not len(rows):
+                return VectorStoreQueryResult(nodes=None, similarities=[], ids=[])
+            scores = self._gather(rows) @ query_vector
+
+        top_k = min(query.similarity_top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = [i for i in best[np.argsort(-scores[best])] if np.isfinite(scores[i])]
+        row_ids = best if rows is None else rows[best]
+        return VectorStoreQueryResult(
+            nodes=None,
+            similarities=[float(scores[i]) for i in best],
+            ids=[self._node_ids[row] for row in row_ids],
+        )
+
+    def _compact(self, path: str):
+        """Rewrite the vector file with live rows only"""
+        tmp_path = os.path.join(path, "vectors.f32.tmp")
+        alive = np.frombuffer(self._alive, dtype=np.uint8) != 0
+        with open(tmp_path, "wb") as f:
+            offset = 0
+            for block in ([self._base] if self._base is not None else []) + self._tail:
+                block_alive = alive[offset:offset + len(block)]
+                f.write(np.ascontiguousarray(block[block_alive]).tobytes())
+                offset += len(block)
+        os.replace(tmp_path, os.path.join(path, "vectors.f32"))
+
+        rows = np.flatnonzero(alive)
+        self._node_ids = [self._node_ids[row] for row in rows]
+        self._ref_doc_ids = [self._ref_doc_ids[row] for row in rows]
+        self._alive = bytearray(b"\x01" * len(rows))
+        # Row ids changed, the inverted lists have to be retrained
+        self._ivf = None
+        self._generation += 1
+        IVFIndex.remove(path)
+
+    def persist(self, persist_path: str, fs=None) -> None:
+        # StorageContext passes <dir>/<namespace>__vector_store.json
+        persist_dir, file_name = os.path.split(persist_path)
+        namespace = file_name.split("__", 1)[0] or "default"
+        path = self.store_dir(persist_dir, namespace)
+        os.makedirs(path, exist_ok=True)
+
+        total_rows = len(self._alive)
+        dead_rows = total_rows - len(self)
+        if path != self._persisted_dir or (total_rows and dead_rows / total_rows > COMPACT_DEAD_RATIO):
+            self._compact(path)
+        else:
+            tail = self._get_tail_matrix()
+            with open(os.path.join(path, "vectors.f32"), "ab") as f:
+                # Only the rows added since the last persist are written
+                f.truncate(self._persisted_rows * (self._dim or 0) * 4)
+                if tail is not None:
+                    f.write(np.ascontiguousarray(tail).tobytes())
+
+        _write_json_atomic(os.path.join(path, "ids.json"), {
+            "dim": self._dim,
+            "node_ids": self._node_ids,
+            "ref_doc_ids": self._ref_doc_ids,
+        })
+        tmp_alive = os.path.join(path, "alive.bin.tmp")
+        with open(tmp_alive, "wb") as f:
+            f.write(bytes(self._alive))
+        os.replace(tmp_alive, os.path.join(path, "alive.bin"))
+        if self.retrieval_mode == "ivf" and self._ivf is not None:
+            self._ivf.save(path)
+        self._load(path)
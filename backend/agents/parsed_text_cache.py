@@ -0,0 +1,62 @@
+# agents/parsed_text_cache.py
+
+import json
+import os
+import threading
+from typing import List, Optional
+
+# Reader metadata describing the file on disk rather than its content, never cached
+FILE_METADATA_KEYS = {"file_path", "file_name", "file_size", "creation_date", "last_modified_date", "last_accessed_date"}
+
+
+class ParsedTextCache:
+    """
+    Text extracted from uploaded files, keyed by the file's sha256 content hash.
+
+    Parsing (PDF, docx, ...) happens once per unique content, however many
+    users upload the same file. Each entry is one JSON file holding a list of
+    {"text", "metadata"} documents as produced by the reader.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, content_hash[:2], f"{content_hash}.json")
+
+    def get(self, content_hash: str) -> Optional[List[dict]]:
+        try:
+            with open(self._path(content_hash), encoding="utf-8") as f:
+                documents = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return documents
+
+    def put(self, content_hash: str, documents: List[dict]):
+        path = self._path(content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(documents, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_parsed_text_cache(cache_dir: str) -> ParsedTextCache:
+    """One cache object per directory in this process, shared by every user's index"""
+    key = os.path.abspath(cache_dir)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ParsedTextCache(cache_dir)
+        return _caches[key]
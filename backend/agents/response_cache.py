@@ -0,0 +1,133 @@
+# agents/response_cache.py
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Case, punctuation and whitespace insensitive form of a question"""
+    question = _PUNCTUATION.sub(" ", question.lower())
+    return _WHITESPACE.sub(" ", question).strip()
+
+
+def context_key(history) -> Optional[str]:
+    """Digest of the conversation sent along with a question, None without one"""
+    if not history:
+        return None
+    digest = hashlib.sha256()
+    for message in history:
+        digest.update(f"{message['role']}\0{message['content']}\0".encode())
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    LRU cache of agent answers keyed by (username, index version, conversation
+    context, normalised question). The same question asked after a different
+    conversation is a different entry, a follow-up like "why?" depends on it.
+
+    Bumping a user's index version makes their old answers unreachable, and
+    invalidate_user frees them. With similarity_threshold and embed_fn set, a
+    miss on the exact key falls back to the most similar cached question of the
+    same user, index version and context.
+    """
+
+    def __init__(self, max_entries: int = 1000, similarity_threshold: Optional[float] = None,
+                 embed_fn: Optional[Callable[[str], List[float]]] = None):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self._entries = OrderedDict()
+        # (username, version, context) -> {normalised question: unit vector}
+        self._vectors = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @property
+    def semantic(self) -> bool:
+        return self.similarity_threshold is not None and self.embed_fn is not None
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embed_fn(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, username: str, version: int, question: str, context: str = None) -> Optional[str]:
+        normalized = normalize_question(question)
+        key = (username, version, context, normalized)
+        with self._lock:
+            answer = self._entries.get(key)
+            if answer is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return answer
+            candidates = dict(self._vectors.get((username, version, context), {}))
+
+        if self.semantic and candidates:
+            # Embedding happens outside the lock, it may be a network call
+            query_vector = self._embed(normalized)
+            questions = list(candidates)
+            scores = np.stack([candidates[q] for q in questions]) @ query_vector
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity_threshold:
+                best_key = (username, version, context, questions[best])
+                with self._lock:
+                    answer = self._entries.get(best_key)
+                    if answer is not None:
+                        self._entries.move_to_end(best_key)
+                        self.semantic_hits += 1
+                        return answer
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, username: str, version: int, question: str, answer: str, context: str = None):
+        if self.max_entries <= 0:
+            return
+        normalized = normalize_question(question)
+        vector = self._embed(normalized) if self.semantic else None
+        key = (username, version, context, normalized)
+        with self._lock:
+            self._entries[key] = answer
+            self._entries.move_to_end(key)
+            if vector is not None:
+                self._vectors.setdefault((username, version, context), {})[normalized] = vector
+            while len(self._entries) > self.max_entries:
+                self._forget(self._entries.popitem(last=False)[0])
+
+    def _forget(self, key):
+        bucket, normalized = key[:3], key[3]
+        vectors = self._vectors.get(bucket)
+        if vectors is not None:
+            vectors.pop(normalized, None)
+            if not vectors:
+                del self._vectors[bucket]
+
+    def invalidate_user(self, username: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == username]:
+                del self._entries[key]
+                self._forget(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
@@ -1,5 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from .settings import settings
+from .indexes import ensure_indexes
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,14 +11,19 @@ class Database:
     users_collection = None
     tasks_collection = None
     todos_collection = None
+    chat_history_collection = None
+    user_files_collection = None
     mongodb_connected = False
     
     # In-memory storage for development when MongoDB is not available
     in_memory_users = {}
     in_memory_tasks = {}
     in_memory_todos = []
+    in_memory_chat_history = {}
+    in_memory_user_files = {}
     task_counter = 1
     todo_counter = 1
+    chat_message_counter = 1
 
 database = Database()
 
@@ -32,11 +38,15 @@ async def connect_to_mongo():
         database.users_collection = database.db.users
         database.tasks_collection = database.db.tasks
         database.todos_collection = database.db.todos
+        database.chat_history_collection = database.db.chat_history
+        database.user_files_collection = database.db.user_files
         
         # Test the connection
         await database.client.admin.command('ping')
         logger.info("Successfully connected to MongoDB!")
         database.mongodb_connected = True
+        
+        await ensure_indexes(database.db)
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {e}")
         logger.warning("Application will continue with in-memory storage for development")
@@ -0,0 +1,113 @@
+"""
+Declarative MongoDB index registry
+
+Indexes are ensured at startup by connect_to_mongo. Run
+    python -m app.config.indexes
+to explain() every registered service query and flag collection scans.
+"""
+
+import argparse
+import asyncio
+import logging
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# collection name -> indexes that must exist
+INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "tasks": [
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"),
+    ],
+    "todos": [
+        IndexModel([("created_by", ASCENDING), ("is_completed", ASCENDING)], name="created_by_is_completed"),
+        IndexModel([("is_completed", ASCENDING)], name="is_completed"),
+    ],
+    "chat_history": [
+        IndexModel([("username", ASCENDING), ("_id", DESCENDING)], name="username_id"),
+    ] + ([
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl",
+                   expireAfterSeconds=settings.CHAT_HISTORY_TTL_DAYS * 24 * 3600),
+    ] if settings.CHAT_HISTORY_TTL_DAYS > 0 else []),
+    "user_files": [
+        IndexModel([("username", ASCENDING), ("filename", ASCENDING)], name="username_filename_unique", unique=True),
+    ],
+}
+
+# Representative service queries: (description, collection, filter, sort)
+SERVICE_QUERIES = [
+    ("users by username", "users", {"username": "explain_user"}, None),
+    ("tasks by user_id", "tasks", {"user_id": "000000000000000000000000"}, None),
+    ("todos page", "todos", {}, [("_id", ASCENDING)]),
+    ("todos completed count", "todos", {"is_completed": True}, None),
+    ("todos by creator", "todos", {"created_by": "celery_auto_task"}, None),
+    ("chat history page", "chat_history", {"username": "explain_user"}, [("_id", DESCENDING)]),
+    ("user files page", "user_files", {"username": "explain_user"}, [("filename", ASCENDING)]),
+]
+
+async def ensure_indexes(db):
+    """Create every registered index, existing ones are left untouched"""
+    for collection_name, indexes in INDEXES.items():
+        try:
+            created = await db[collection_name].create_indexes(indexes)
+            logger.info(f"Ensured indexes on {collection_name}: {', '.join(created)}")
+        except PyMongoError as e:
+            # e.g. duplicate usernames already stored, the app keeps running without the index
+            logger.error(f"Failed to ensure indexes on {collection_name}: {e}")
+
+def _plan_stages(plan: dict):
+    """Yield every stage name in a query plan tree"""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+async def explain_queries(db) -> list:
+    """Explain each registered service query and report the winning plan's stages"""
+    report = []
+    for description, collection_name, query, sort in SERVICE_QUERIES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        stages = list(_plan_stages(explanation["queryPlanner"]["winningPlan"]))
+        report.append({
+            "query": description,
+            "collection": collection_name,
+            "stages": stages,
+            "collection_scan": "COLLSCAN" in stages
+        })
+    return report
+
+async def _run_report(ensure: bool) -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(settings.MONGO_DB_URL, serverSelectionTimeoutMS=5000)
+    try:
+        db = client.todo
+        if ensure:
+            await ensure_indexes(db)
+        report = await explain_queries(db)
+    finally:
+        client.close()
+
+    for entry in report:
+        flag = "COLLSCAN" if entry["collection_scan"] else "ok"
+        print(f"[{flag:>8}] {entry['query']:<24} {entry['collection']:<8} {' <- '.join(entry['stages'])}")
+    return sum(entry["collection_scan"] for entry in report)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explain service queries and flag collection scans")
+    parser.add_argument("--ensure", action="store_true", help="create registered indexes before explaining")
+    args = parser.parse_args()
+    scans = asyncio.run(_run_report(args.ensure))
+    raise SystemExit(1 if scans else 0)
@@ -0,0 +1,39 @@
+from redis import asyncio as aioredis
+from .settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RedisConnection:
+    client: aioredis.Redis = None
+    redis_connected = False
+
+redis_connection = RedisConnection()
+
+async def connect_to_redis():
+    """Create Redis connection (same REDIS_URL as the Celery broker)"""
+    try:
+        redis_connection.client = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=5
+        )
+        
+        # Test the connection
+        await redis_connection.client.ping()
+        logger.info("Successfully connected to Redis!")
+        redis_connection.redis_connected = True
+    except Exception as e:
+        logger.error(f"Failed to connect to Redis: {e}")
+        logger.warning("Application will continue with in-process fallbacks")
+        redis_connection.redis_connected = False
+
+async def close_redis_connection():
+    """Close Redis connection"""
+    if redis_connection.client:
+        await redis_connection.client.close()
+        redis_connection.client = None
+        redis_connection.redis_connected = False
+        logger.info("Redis connection closed")
+
+def get_redis():
+    return redis_connection
@@ -7,16 +7,74 @@ class Settings:
     # MongoDB configuration
     MONGO_DB_URL: str = os.getenv("MONGO_DB_URL", "mongodb://localhost:27017")
     
+    # Redis configuration (shared with the Celery broker)
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    
     # JWT configuration
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-keep-it-secret")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_REVOCATION_BACKEND: str = os.getenv("TOKEN_REVOCATION_BACKEND", "redis")
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    
+    # User identity cache configuration
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+    
+    # Password hashing configuration
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
     
     # CORS configuration
     ALLOWED_ORIGINS: list = ["*"]
     
+    # Pagination configuration
+    TODOS_PAGE_SIZE: int = int(os.getenv("TODOS_PAGE_SIZE", "50"))
+    TODOS_MAX_PAGE_SIZE: int = int(os.getenv("TODOS_MAX_PAGE_SIZE", "500"))
+    STREAM_BATCH_SIZE: int = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+    
+    # Bulk todo creation configuration
+    TODOS_BULK_MAX_ITEMS: int = int(os.getenv("TODOS_BULK_MAX_ITEMS", "10000"))
+    TODOS_BULK_CHUNK_SIZE: int = int(os.getenv("TODOS_BULK_CHUNK_SIZE", "1000"))
+    
     # Upload configuration
     UPLOADS_DIR: str = "uploads"
+    # Next to UPLOADS_DIR, not inside it: every entry of UPLOADS_DIR is some
+    # username's directory. Must be on the same filesystem (renames, hard links)
+    UPLOAD_STORE_DIR: str = "upload_store"
+    # Partial uploads are written here, then renamed into UPLOADS_DIR/<username>
+    UPLOADS_TMP_DIR: str = os.path.join(UPLOAD_STORE_DIR, "incoming")
+    # Unique upload contents, user files are hard links into this store
+    UPLOADS_BLOB_DIR: str = os.path.join(UPLOAD_STORE_DIR, "blobs")
+    FILES_PAGE_SIZE: int = int(os.getenv("FILES_PAGE_SIZE", "100"))
+    FILES_MAX_PAGE_SIZE: int = int(os.getenv("FILES_MAX_PAGE_SIZE", "1000"))
+    MAX_UPLOAD_MB: int = int(os.getenv("MAX_UPLOAD_MB", "200"))
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    
+    # Chat execution configuration
+    CHAT_MAX_CONCURRENCY: int = int(os.getenv("CHAT_MAX_CONCURRENCY", "8"))
+    CHAT_MAX_PENDING: int = int(os.getenv("CHAT_MAX_PENDING", "32"))
+    CHAT_MAX_PER_USER: int = int(os.getenv("CHAT_MAX_PER_USER", "2"))
+    CHAT_TIMEOUT_SECONDS: float = float(os.getenv("CHAT_TIMEOUT_SECONDS", "60"))
+    
+    # Chat response cache configuration (empty similarity disables embedding matching)
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+    RESPONSE_CACHE_SIMILARITY: float | None = (
+        float(os.getenv("RESPONSE_CACHE_SIMILARITY")) if os.getenv("RESPONSE_CACHE_SIMILARITY") else None
+    )
+    
+    # Estimated memory allowed for resident per-user indexes before cold users are evicted
+    USER_INDEX_MEMORY_BUDGET_MB: int = int(os.getenv("USER_INDEX_MEMORY_BUDGET_MB", "512"))
+    
+    # Chat history configuration
+    CHAT_HISTORY_PAGE_SIZE: int = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", "50"))
+    CHAT_HISTORY_MAX_PAGE_SIZE: int = int(os.getenv("CHAT_HISTORY_MAX_PAGE_SIZE", "200"))
+    # Recent messages read per question to build the agent's context window
+    CHAT_HISTORY_HOT_MESSAGES: int = int(os.getenv("CHAT_HISTORY_HOT_MESSAGES", "20"))
+    # Messages older than this are expired by MongoDB, 0 keeps them forever
+    CHAT_HISTORY_TTL_DAYS: int = int(os.getenv("CHAT_HISTORY_TTL_DAYS", "30"))
+    # Upper bound on the estimated tokens of past conversation sent with each question
+    CHAT_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "1500"))
     
     # OpenAI configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
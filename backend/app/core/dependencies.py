@@ -1,9 +1,19 @@
 from fastapi import Depends
 from ..config.database import get_database
-from .security import get_current_user
+from ..models.user import AuthenticatedUser
+from ..services.user_service import user_service
+from .security import get_current_user, get_token_claims
 
 def get_db():
     return get_database()
 
 def get_authenticated_user(current_user: str = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_authenticated_user_record(claims: dict = Depends(get_token_claims)) -> AuthenticatedUser:
+    # Tokens carry the user id, older tokens fall back to the cached lookup
+    if claims.get("uid"):
+        return AuthenticatedUser(id=claims["uid"], username=claims["sub"])
+    
+    user = await user_service.resolve_user(claims["sub"])
+    return AuthenticatedUser(id=user["id"], username=user["username"])
\ No newline at end of file
@@ -0,0 +1,124 @@
+import heapq
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable, List
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from ..config.redis import get_redis
+from ..config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RevocationStore(ABC):
+    """
+    Set of revoked token ids (jti or token digest), each kept only for the
+    remaining lifetime of its token.
+    """
+
+    @abstractmethod
+    async def revoke(self, key: str, ttl: float):
+        ...
+
+    async def is_revoked(self, key: str) -> bool:
+        return (await self.revoked_many([key]))[0]
+
+    @abstractmethod
+    async def revoked_many(self, keys: Iterable[str]) -> List[bool]:
+        ...
+
+class InMemoryRevocationStore(RevocationStore):
+    """Process-local store, expired entries are swept on a fixed interval"""
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._expires_at = {}
+        self._expiry_heap = []
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def __len__(self):
+        return len(self._expires_at)
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self.sweep(now)
+            self._next_sweep = now + self.sweep_interval
+
+    def sweep(self, now: float = None):
+        now = time.monotonic() if now is None else now
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            # Skip stale heap entries for keys that were revoked again later
+            if self._expires_at.get(key) == expires_at:
+                del self._expires_at[key]
+
+    async def revoke(self, key: str, ttl: float):
+        expires_at = time.monotonic() + ttl
+        self._expires_at[key] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        self._maybe_sweep()
+
+    async def revoked_many(self, keys: Iterable[str]) -> List[bool]:
+        self._maybe_sweep()
+        now = time.monotonic()
+        expires_at = self._expires_at
+        return [expires_at.get(key, 0) > now for key in keys]
+
+def _revocation_unavailable(e: Exception) -> HTTPException:
+    logger.error(f"Token revocation store unavailable: {e}")
+    return HTTPException(
+        status_code=503,
+        detail="Authentication is temporarily unavailable, please retry shortly",
+        headers={"Retry-After": "5"}
+    )
+
+class RedisRevocationStore(RevocationStore):
+    """
+    Store shared by every worker, Redis expires the keys on its own.
+
+    Fails closed: while Redis is unreachable a token cannot be checked against
+    the revocation list, so requests get a 503 rather than being let through.
+    """
+
+    key_prefix = "revoked_token:"
+
+    def __init__(self, client):
+        self.client = client
+
+    async def revoke(self, key: str, ttl: float):
+        try:
+            await self.client.set(self.key_prefix + key, 1, ex=max(1, math.ceil(ttl)))
+        except RedisError as e:
+            raise _revocation_unavailable(e)
+
+    async def revoked_many(self, keys: Iterable[str]) -> List[bool]:
+        keys = [self.key_prefix + key for key in keys]
+        if not keys:
+            return []
+        try:
+            values = await self.client.mget(keys)
+        except RedisError as e:
+            raise _revocation_unavailable(e)
+        return [value is not None for value in values]
+
+revocation_store: RevocationStore = InMemoryRevocationStore()
+
+def configure_revocation_store():
+    """Pick the revocation backend, called at startup after Redis is connected"""
+    global revocation_store
+    redis = get_redis()
+    if settings.TOKEN_REVOCATION_BACKEND == "redis" and redis.redis_connected:
+        revocation_store = RedisRevocationStore(redis.client)
+        logger.info("Token revocation backend: redis")
+    else:
+        if settings.TOKEN_REVOCATION_BACKEND == "redis":
+            logger.warning("Redis unavailable, token revocation falls back to in-memory store")
+        revocation_store = InMemoryRevocationStore()
+        logger.info("Token revocation backend: memory")
+    return revocation_store
+
+def get_revocation_store() -> RevocationStore:
+    return revocation_store
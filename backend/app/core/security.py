@@ -1,19 +1,31 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
+import time
+import uuid
 from typing import Optional
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from ..config.settings import settings
+from ..utils.executors import BoundedExecutor
+from .token_cache import TokenCache, token_digest
+from .revocation import get_revocation_store
 
 # Password hashing configuration
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is CPU bound, so it runs in its own bounded pool instead of on the event loop
+password_executor = BoundedExecutor(
+    name="bcrypt",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
 # Security
 security = HTTPBearer()
 
-# Store invalidated tokens (in production, use Redis or similar)
-invalidated_tokens = set()
+# Verified token payloads, so repeat requests with the same bearer token skip decode and HMAC
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_SIZE)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -21,6 +33,12 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_executor.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_executor.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -28,23 +46,50 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def _revocation_key(payload: dict, digest: bytes) -> str:
+    # Tokens issued before jti was added are revoked by digest
+    return payload.get("jti") or digest.hex()
+
+async def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     try:
         token = credentials.credentials
+        
+        digest = token_digest(token)
+        payload = token_cache.get(digest)
+        if payload is None:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            token_cache.put(digest, payload)
 
-        if token in invalidated_tokens:
+        if await get_revocation_store().is_revoked(_revocation_key(payload, digest)):
             raise HTTPException(status_code=401, detail="Token has been invalidated")
-        
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+        if payload.get("sub") is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        return username
+        return payload
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
-def invalidate_token(token: str):
-    invalidated_tokens.add(token)
\ No newline at end of file
+async def get_current_user(claims: dict = Depends(get_token_claims)) -> str:
+    return claims["sub"]
+
+async def invalidate_token(token: str):
+    digest = token_digest(token)
+    payload = token_cache.get(digest)
+    token_cache.evict(digest)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            # Expired or forged tokens are already rejected, nothing to revoke
+            return
+
+    expires_at = payload.get("exp")
+    if expires_at is None:
+        ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    else:
+        ttl = expires_at - time.time()
+    if ttl > 0:
+        await get_revocation_store().revoke(_revocation_key(payload, digest), ttl)
\ No newline at end of file
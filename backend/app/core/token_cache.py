@@ -0,0 +1,51 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+def token_digest(token: str) -> bytes:
+    """Fixed-size key for a bearer token"""
+    return hashlib.sha256(token.encode()).digest()
+
+class TokenCache:
+    """
+    LRU cache of already verified JWT payloads keyed by token digest.
+    Entries are dropped once the token's exp claim has passed.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[digest]
+            return None
+
+        self._entries.move_to_end(digest)
+        return payload
+
+    def put(self, digest: bytes, payload: dict):
+        expires_at = payload.get("exp")
+        if expires_at is None or self.max_size <= 0:
+            # Tokens without exp are never cached, they would live forever
+            return
+
+        self._entries[digest] = (payload, float(expires_at))
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def evict(self, digest: bytes):
+        self._entries.pop(digest, None)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,48 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+from ..config.settings import settings
+
+class UserCache:
+    """
+    Bounded LRU of resolved user records (never includes the password hash),
+    entries expire ttl seconds after they were stored.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, username: str) -> Optional[dict]:
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+
+        record, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[username]
+            return None
+
+        self._entries.move_to_end(username)
+        return record
+
+    def put(self, username: str, record: dict):
+        if self.max_size <= 0:
+            return
+
+        self._entries[username] = (record, time.monotonic() + self.ttl)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, username: str):
+        self._entries.pop(username, None)
+
+    def clear(self):
+        self._entries.clear()
+
+user_cache = UserCache(max_size=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
@@ -1,9 +1,31 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 class ChatMessage(BaseModel):
     message: str
 
 class ChatResponse(BaseModel):
     response: str
-    timestamp: datetime
\ No newline at end of file
+    timestamp: datetime
+
+class ChatHistoryMessage(BaseModel):
+    id: int | str
+    role: str
+    content: str
+    created_at: datetime
+
+class ChatHistoryPage(BaseModel):
+    history: List[ChatHistoryMessage]
+    next_cursor: Optional[str] = None
+
+class UserFile(BaseModel):
+    name: str
+    size: int
+    sha256: Optional[str] = None
+    uploaded_at: datetime
+    index_status: str
+
+class UserFilePage(BaseModel):
+    files: List[UserFile]
+    next_cursor: Optional[str] = None
@@ -1,6 +1,26 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from ..config.settings import settings
 
 class ToDo(BaseModel):
-    id: int | None = None
+    id: int | str | None = None
     name: str
-    is_completed: bool
\ No newline at end of file
+    is_completed: bool
+
+class ToDoPage(BaseModel):
+    items: List[ToDo]
+    next_cursor: Optional[str] = None
+
+class ToDoBulkCreate(BaseModel):
+    # Checked by the validator, so an oversized batch is refused before its items are validated
+    items: List[ToDo] = Field(..., min_length=1, max_length=settings.TODOS_BULK_MAX_ITEMS)
+
+class ToDoBulkItemResult(BaseModel):
+    index: int
+    id: int | str | None = None
+    error: Optional[str] = None
+
+class ToDoBulkResult(BaseModel):
+    inserted: int
+    failed: int
+    results: List[ToDoBulkItemResult]
@@ -5,6 +5,10 @@ class User(BaseModel):
     username: str
     password: str
 
+class AuthenticatedUser(BaseModel):
+    id: str
+    username: str
+
 class UserResponse(BaseModel):
     username: str
     created_at: datetime
\ No newline at end of file
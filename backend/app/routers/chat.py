@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends, File, UploadFile
-from ..models.chat import ChatMessage, ChatResponse
+from fastapi import APIRouter, Depends, File, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from ..models.chat import ChatMessage, ChatResponse, ChatHistoryPage, UserFilePage
+from ..config.settings import settings
 from ..services.chat_service import chat_service
 from ..core.dependencies import get_authenticated_user
 
@@ -12,9 +15,28 @@ async def chat_with_agent(
 ):
     return await chat_service.chat_with_agent(chat_message, current_user)
 
-@router.get("/history")
-async def get_chat_history(current_user: str = Depends(get_authenticated_user)):
-    return await chat_service.get_chat_history(current_user)
+@router.post("/stream")
+async def stream_chat_with_agent(
+    chat_message: ChatMessage,
+    current_user: str = Depends(get_authenticated_user)
+):
+    return StreamingResponse(
+        await chat_service.stream_chat(chat_message, current_user),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+async def get_chat_stats(current_user: str = Depends(get_authenticated_user)):
+    return await chat_service.get_stats()
+
+@router.get("/history", response_model=ChatHistoryPage)
+async def get_chat_history(
+    before: Optional[str] = None,
+    limit: int = Query(settings.CHAT_HISTORY_PAGE_SIZE, ge=1, le=settings.CHAT_HISTORY_MAX_PAGE_SIZE),
+    current_user: str = Depends(get_authenticated_user)
+):
+    return await chat_service.get_chat_history(current_user, before, limit)
 
 @router.post("/clear")
 async def clear_chat_history(current_user: str = Depends(get_authenticated_user)):
@@ -27,9 +49,13 @@ async def upload_file(
 ):
     return await chat_service.upload_file(file, current_user)
 
-@router.get("/files")
-async def get_user_files(current_user: str = Depends(get_authenticated_user)):
-    return await chat_service.get_user_files(current_user)
+@router.get("/files", response_model=UserFilePage)
+async def get_user_files(
+    after: Optional[str] = None,
+    limit: int = Query(settings.FILES_PAGE_SIZE, ge=1, le=settings.FILES_MAX_PAGE_SIZE),
+    current_user: str = Depends(get_authenticated_user)
+):
+    return await chat_service.get_user_files(current_user, after, limit)
 
 @router.delete("/files/{filename}")
 async def delete_user_file(
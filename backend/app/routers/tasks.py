@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from typing import List
+from ..config.settings import settings
 from ..models.task import Task, TaskCreate
+from ..models.user import AuthenticatedUser
 from ..services.task_service import task_service
-from ..core.dependencies import get_authenticated_user
+from ..core.dependencies import get_authenticated_user_record
+from ..utils.streaming import ndjson_stream
 
 router = APIRouter(tags=["tasks"])
 
@@ -10,22 +14,29 @@ router = APIRouter(tags=["tasks"])
 @router.post("/create_task", response_model=Task)
 async def create_task(
     task: TaskCreate,
-    current_user: str = Depends(get_authenticated_user)
+    current_user: AuthenticatedUser = Depends(get_authenticated_user_record)
 ):
     return await task_service.create_task(task, current_user)
 
 @router.get("/get_tasks", response_model=List[Task])
-async def get_tasks(current_user: str = Depends(get_authenticated_user)):
+async def get_tasks(current_user: AuthenticatedUser = Depends(get_authenticated_user_record)):
     return await task_service.get_tasks(current_user)
 
 # New RESTful endpoints
 @router.post("/tasks", response_model=Task)
 async def create_task_rest(
     task: TaskCreate,
-    current_user: str = Depends(get_authenticated_user)
+    current_user: AuthenticatedUser = Depends(get_authenticated_user_record)
 ):
     return await task_service.create_task(task, current_user)
 
 @router.get("/tasks", response_model=List[Task])
-async def get_tasks_rest(current_user: str = Depends(get_authenticated_user)):
-    return await task_service.get_tasks(current_user) 
\ No newline at end of file
+async def get_tasks_rest(current_user: AuthenticatedUser = Depends(get_authenticated_user_record)):
+    return await task_service.get_tasks(current_user)
+
+@router.get("/tasks/export")
+async def export_tasks(current_user: AuthenticatedUser = Depends(get_authenticated_user_record)):
+    return StreamingResponse(
+        ndjson_stream(await task_service.iter_tasks(current_user), settings.STREAM_BATCH_SIZE),
+        media_type="application/x-ndjson"
+    )
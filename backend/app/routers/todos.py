@@ -1,16 +1,41 @@
-from fastapi import APIRouter, Depends
-from typing import List
-from ..models.todo import ToDo
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from ..models.todo import ToDo, ToDoBulkCreate, ToDoBulkResult, ToDoPage
+from ..config.settings import settings
 from ..services.todo_service import todo_service
+from ..services.todo_stats_service import todo_stats_service
 from ..core.dependencies import get_authenticated_user
+from ..utils.streaming import json_array_stream, ndjson_stream
 
 router = APIRouter(prefix="/todos", tags=["todos"])
 
-@router.get("/", response_model=List[ToDo])
-async def get_todos(current_user: str = Depends(get_authenticated_user)):
-    return await todo_service.get_todos()
-
-
+@router.get("/", response_model=ToDoPage)
+async def get_todos(
+    after: Optional[str] = None,
+    limit: int = Query(settings.TODOS_PAGE_SIZE, ge=1, le=settings.TODOS_MAX_PAGE_SIZE),
+    stream: bool = False,
+    current_user: str = Depends(get_authenticated_user)
+):
+    if stream:
+        # Full list as a JSON array, streamed straight from the cursor
+        return StreamingResponse(
+            json_array_stream(todo_service.iter_todos(), settings.STREAM_BATCH_SIZE),
+            media_type="application/json"
+        )
+    return await todo_service.get_todos(after, limit)
+
+@router.get("/export")
+async def export_todos(current_user: str = Depends(get_authenticated_user)):
+    return StreamingResponse(
+        ndjson_stream(todo_service.iter_todos(), settings.STREAM_BATCH_SIZE),
+        media_type="application/x-ndjson"
+    )
+
+@router.get("/stats")
+async def get_todo_stats(current_user: str = Depends(get_authenticated_user)):
+    # Materialised counters, the todos collection is never scanned here
+    return await todo_stats_service.get_stats()
 
 @router.get("/{todo_id}", response_model=ToDo)
 async def get_todo(todo_id: int, current_user: str = Depends(get_authenticated_user)):
@@ -20,6 +45,10 @@ async def get_todo(todo_id: int, current_user: str = Depends(get_authenticated_u
 async def create_todo(todo: ToDo, current_user: str = Depends(get_authenticated_user)):
     return await todo_service.create_todo(todo)
 
+@router.post("/bulk", response_model=ToDoBulkResult)
+async def create_todos_bulk(bulk: ToDoBulkCreate, current_user: str = Depends(get_authenticated_user)):
+    return await todo_service.create_todos_bulk(bulk.items)
+
 @router.put("/{todo_id}", response_model=ToDo)
 async def update_todo(todo_id: int, updated_todo: ToDo, current_user: str = Depends(get_authenticated_user)):
     return await todo_service.update_todo(todo_id, updated_todo)
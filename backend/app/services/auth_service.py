@@ -1,9 +1,11 @@
 from fastapi import HTTPException
 from datetime import datetime, timedelta, timezone
 from ..models.user import User, UserResponse
-from ..core.security import verify_password, get_password_hash, create_access_token, invalidate_token
+from ..core.security import verify_password_async, get_password_hash_async, create_access_token, invalidate_token
+from ..core.user_cache import user_cache
 from ..config.database import get_database
 from ..config.settings import settings
+from pymongo.errors import DuplicateKeyError
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,24 +22,30 @@ class AuthService:
                 raise HTTPException(status_code=400, detail="Username already registered")
             
             # Hash the password before storing
-            hashed_password = get_password_hash(user.password)
+            hashed_password = await get_password_hash_async(user.password)
             user_dict = user.model_dump()
             user_dict["password"] = hashed_password
             user_dict["created_at"] = datetime.now(timezone.utc)
             
-            await self.db.users_collection.insert_one(user_dict)
+            try:
+                await self.db.users_collection.insert_one(user_dict)
+            except DuplicateKeyError:
+                # Another signup for the same name won the race past the check above
+                raise HTTPException(status_code=400, detail="Username already registered")
+            user_cache.invalidate(user.username)
         else:
             # Use in-memory storage
             if user.username in self.db.in_memory_users:
                 raise HTTPException(status_code=400, detail="Username already registered")
             
             # Hash the password before storing
-            hashed_password = get_password_hash(user.password)
+            hashed_password = await get_password_hash_async(user.password)
             self.db.in_memory_users[user.username] = {
                 "username": user.username,
                 "password": hashed_password,
                 "created_at": datetime.now(timezone.utc)
             }
+            user_cache.invalidate(user.username)
         
         return {"message": "User created successfully"}
 
@@ -45,24 +53,26 @@ class AuthService:
         if self.db.mongodb_connected:
             # Use MongoDB
             stored_user = await self.db.users_collection.find_one({"username": user.username})
-            if not stored_user or not verify_password(user.password, stored_user["password"]):
+            if not stored_user or not await verify_password_async(user.password, stored_user["password"]):
                 raise HTTPException(status_code=401, detail="Invalid credentials")
+            user_id = str(stored_user["_id"])
         else:
             # Use in-memory storage
             stored_user = self.db.in_memory_users.get(user.username)
-            if not stored_user or not verify_password(user.password, stored_user["password"]):
+            if not stored_user or not await verify_password_async(user.password, stored_user["password"]):
                 raise HTTPException(status_code=401, detail="Invalid credentials")
+            user_id = user.username
         
         # Create access token
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
+            data={"sub": user.username, "uid": user_id}, expires_delta=access_token_expires
         )
         
         return {"access_token": access_token, "token_type": "bearer"}
 
     async def logout(self, token: str):
-        invalidate_token(token)
+        await invalidate_token(token)
         return {"message": "Successfully logged out"}
 
 auth_service = AuthService()
\ No newline at end of file
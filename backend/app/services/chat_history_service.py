@@ -0,0 +1,153 @@
+from fastapi import HTTPException
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+from ..config.database import get_database
+from ..config.settings import settings
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+import logging
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PROJECTION = {"role": 1, "content": 1, "created_at": 1}
+# The in-memory fallback keeps at most this many messages per user
+IN_MEMORY_MAX_MESSAGES = 1000
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token plus role overhead)"""
+    return len(text) // 4 + 4
+
+class ChatHistoryService:
+    """
+    Per-user chat history, persisted in the chat_history collection.
+
+    The agent's context window is read from the collection on every question,
+    one query on the username_id index for the latest CHAT_HISTORY_HOT_MESSAGES.
+    Nothing is cached per process, so every API worker sees exchanges written
+    by the others and a cleared history is gone everywhere at once.
+    """
+
+    def __init__(self):
+        self.db = get_database()
+
+    async def _recent_messages(self, username: str) -> List[dict]:
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            cursor = self.db.chat_history_collection.find(
+                {"username": username}, HISTORY_PROJECTION
+            ).sort("_id", -1).limit(settings.CHAT_HISTORY_HOT_MESSAGES)
+            messages = [
+                {"role": message["role"], "content": message["content"]}
+                async for message in cursor
+            ]
+            messages.reverse()
+        else:
+            # Use in-memory storage
+            stored = self.db.in_memory_chat_history.get(username, ())
+            messages = [
+                {"role": message["role"], "content": message["content"]}
+                for message in list(stored)[-settings.CHAT_HISTORY_HOT_MESSAGES:]
+            ]
+        return messages
+
+    async def get_context(self, username: str, token_budget: int = settings.CHAT_CONTEXT_TOKEN_BUDGET) -> List[dict]:
+        """
+        Most recent messages that fit in token_budget, oldest first
+        """
+        context = []
+        used = 0
+        for message in reversed(await self._recent_messages(username)):
+            used += estimate_tokens(message["content"])
+            if used > token_budget:
+                break
+            context.append(message)
+        context.reverse()
+        return context
+
+    async def add_exchange(self, username: str, question: str, answer: str):
+        """
+        Store a question and the agent's answer
+        """
+        now = datetime.now(timezone.utc)
+        messages = [
+            {"role": "user", "content": question},
+            {"role": "agent", "content": answer}
+        ]
+
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            await self.db.chat_history_collection.insert_many([
+                {"username": username, "role": message["role"], "content": message["content"], "created_at": now}
+                for message in messages
+            ])
+        else:
+            # Use in-memory storage
+            stored = self.db.in_memory_chat_history.setdefault(username, deque(maxlen=IN_MEMORY_MAX_MESSAGES))
+            for message in messages:
+                stored.append({"id": self.db.chat_message_counter, **message, "created_at": now})
+                self.db.chat_message_counter += 1
+
+    async def get_history(self, username: str, before: Optional[str] = None,
+                          limit: int = settings.CHAT_HISTORY_PAGE_SIZE) -> dict:
+        """
+        Page of the newest messages older than the cursor, returned oldest first;
+        next_cursor pages further back in time
+        """
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            query = {"username": username}
+            if before:
+                try:
+                    query["_id"] = {"$lt": ObjectId(before)}
+                except InvalidId:
+                    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+            # Fetch one extra message to know whether another page exists
+            cursor = self.db.chat_history_collection.find(query, HISTORY_PROJECTION).sort("_id", -1).limit(limit + 1)
+            messages = [
+                {
+                    "id": str(message["_id"]),
+                    "role": message["role"],
+                    "content": message["content"],
+                    "created_at": message["created_at"]
+                }
+                async for message in cursor
+            ]
+        else:
+            # Use in-memory storage
+            try:
+                before_id = int(before) if before else None
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+
+            messages = []
+            for message in reversed(self.db.in_memory_chat_history.get(username, ())):
+                if before_id is None or message["id"] < before_id:
+                    messages.append(dict(message))
+                    if len(messages) > limit:
+                        break
+
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        messages.reverse()
+        return {
+            "history": messages,
+            "next_cursor": str(messages[0]["id"]) if has_more else None
+        }
+
+    async def clear(self, username: str):
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            await self.db.chat_history_collection.delete_many({"username": username})
+        else:
+            # Use in-memory storage
+            self.db.in_memory_chat_history.pop(username, None)
+
+    def stats(self) -> dict:
+        return {
+            "context_messages": settings.CHAT_HISTORY_HOT_MESSAGES,
+            "context_token_budget": settings.CHAT_CONTEXT_TOKEN_BUDGET
+        }
+
+chat_history_service = ChatHistoryService()
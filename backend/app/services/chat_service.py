@@ -1,8 +1,15 @@
 from fastapi import HTTPException, UploadFile
 from datetime import datetime, timezone
-from typing import List
+from typing import AsyncIterator, List, Optional
 from ..models.chat import ChatMessage, ChatResponse
 from ..config.settings import settings
+from .chat_history_service import chat_history_service
+from .file_catalog_service import file_catalog_service, INDEX_FAILED, INDEX_INDEXED
+from ..utils.executors import BoundedExecutor
+from ..utils.blob_store import BlobStore
+from ..utils.uploads import safe_filename, save_upload
+import asyncio
+import json
 import os
 import sys
 import logging
@@ -12,39 +19,134 @@ backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-from interaction import A2AInteraction
-
 logger = logging.getLogger(__name__)
 
 class ChatService:
     def __init__(self):
+        # Agents are built lazily off the event loop, see _get_interaction
+        self.a2a_interaction = None
+        self._interaction_future = None
+        
+        # The agents make blocking OpenAI calls, so they run in their own pool
+        self.agent_executor = BoundedExecutor(
+            name="chat-agent",
+            max_workers=settings.CHAT_MAX_CONCURRENCY,
+            max_pending=settings.CHAT_MAX_PENDING
+        )
+        self._active_chats = {}
+        
+        # Identical uploads are stored once and linked into each user's directory
+        self.blob_store = BlobStore(settings.UPLOADS_BLOB_DIR)
+        
+        # Create uploads directory if it doesn't exist
+        os.makedirs(settings.UPLOADS_DIR, exist_ok=True)
+
+    def _build_interaction(self):
+        """
+        Import and construct the agent stack, runs in a worker thread
+        """
         try:
-            self.a2a_interaction = A2AInteraction()
+            # Imported here so LangChain/LlamaIndex stay off the application import path
+            from interaction import A2AInteraction
+            
+            interaction = A2AInteraction(
+                uploads_dir=settings.UPLOADS_DIR,
+                response_cache_size=settings.RESPONSE_CACHE_SIZE,
+                response_cache_similarity=settings.RESPONSE_CACHE_SIMILARITY,
+                index_memory_budget=settings.USER_INDEX_MEMORY_BUDGET_MB * 1024 * 1024
+            )
             logger.info("A2A Interaction initialized successfully")
+            return interaction
         except Exception as e:
             logger.error(f"Failed to initialize A2A Interaction: {e}")
-            self.a2a_interaction = None
-        
-        # Create uploads directory if it doesn't exist
-        os.makedirs(settings.UPLOADS_DIR, exist_ok=True)
+            return None
+
+    async def _get_interaction(self):
+        """
+        Return the agent stack, building it on first use; concurrent callers share one build
+        """
+        if self._interaction_future is None:
+            loop = asyncio.get_running_loop()
+            self._interaction_future = loop.run_in_executor(None, self._build_interaction)
+        future = self._interaction_future
+        try:
+            self.a2a_interaction = await asyncio.shield(future)
+        except Exception:
+            self._forget_build(future)
+            raise
+        if self.a2a_interaction is None:
+            # Failed builds are not kept, the next request tries again
+            self._forget_build(future)
+        return self.a2a_interaction
+
+    def _forget_build(self, future):
+        # Only if no other caller already started a new build
+        if self._interaction_future is future:
+            self._interaction_future = None
+
+    async def warm_up(self):
+        """
+        Build the agents and load the index in the background at startup
+        """
+        await self._get_interaction()
+
+    def _reserve_slot(self, username: str):
+        if self._active_chats.get(username, 0) >= settings.CHAT_MAX_PER_USER:
+            raise HTTPException(status_code=429, detail="Too many chat requests in progress, please wait")
+        self._active_chats[username] = self._active_chats.get(username, 0) + 1
+
+    def _release_slot(self, username: str):
+        remaining = self._active_chats[username] - 1
+        if remaining:
+            self._active_chats[username] = remaining
+        else:
+            del self._active_chats[username]
+
+    async def _run_agent(self, username: str, func, *args, reserved: bool = False):
+        """
+        Run a blocking agent call off the event loop with per-user and global limits.
+        The user's slot is held until the agent thread finishes, not until the
+        caller gives up, so a timed out request keeps counting against the limit.
+        With reserved the caller already holds the slot and hands it over here.
+        """
+        if not reserved:
+            self._reserve_slot(username)
+        try:
+            # Submitted before the first await, so the slot is always handed to the pool
+            future = self.agent_executor.submit(func, *args, on_done=lambda: self._release_slot(username))
+        except BaseException:
+            self._release_slot(username)
+            raise
+        return await asyncio.wait_for(future, timeout=settings.CHAT_TIMEOUT_SECONDS)
 
     async def chat_with_agent(self, chat_message: ChatMessage, username: str) -> ChatResponse:
         """
         Chat endpoint that uses LangChain and LlamaIndex agents with user-specific context
         """
         try:
-            if not self.a2a_interaction:
+            interaction = await self._get_interaction()
+            if not interaction:
                 # Fallback response if agents are not available
                 response_text = "I'm sorry, the AI agents are currently unavailable. Please try again later."
             else:
                 # Use the A2A interaction to get response from agents with user context
-                response_text = self.a2a_interaction.ask(chat_message.message, username)
+                history = await chat_history_service.get_context(username)
+                version = await file_catalog_service.get_version(username)
+                response_text = await self._run_agent(
+                    username, interaction.ask, chat_message.message, username, history, version
+                )
+                await chat_history_service.add_exchange(username, chat_message.message, response_text)
             
             return ChatResponse(
                 response=response_text,
                 timestamp=datetime.now(timezone.utc)
             )
         
+        except HTTPException:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"Chat request for {username} timed out after {settings.CHAT_TIMEOUT_SECONDS}s")
+            raise HTTPException(status_code=504, detail="The assistant took too long to respond. Please try again.")
         except Exception as e:
             logger.error(f"Error in chat endpoint: {e}")
             # Return a friendly error message
@@ -53,28 +155,113 @@ class ChatService:
                 timestamp=datetime.now(timezone.utc)
             )
 
-    async def get_chat_history(self, username: str):
+    async def stream_chat(self, chat_message: ChatMessage, username: str) -> AsyncIterator[str]:
+        """
+        Check limits up front, then return a Server-Sent-Events stream of agent
+        steps, final-answer tokens and the final answer
+        """
+        # Reserved now, so concurrent streams cannot all pass the check before any starts
+        self._reserve_slot(username)
+        executor = self.agent_executor
+        if executor.in_flight >= executor.max_workers + executor.max_pending:
+            self._release_slot(username)
+            raise HTTPException(status_code=429, detail="Server is busy, please retry shortly")
+        
+        return self._stream_events(chat_message.message, username)
+
+    def _stream_events(self, message: str, username: str) -> AsyncIterator[str]:
+        """
+        Start the agent right away, the task owns the reserved slot even if the
+        response body is never iterated
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        
+        def emit(event: dict):
+            # Called from the agent thread
+            loop.call_soon_threadsafe(events.put_nowait, event)
+        
+        handed_over = False
+        
+        async def run():
+            nonlocal handed_over
+            try:
+                interaction = await self._get_interaction()
+                if not interaction:
+                    emit({"type": "final", "content": "I'm sorry, the AI agents are currently unavailable. Please try again later."})
+                else:
+                    history = await chat_history_service.get_context(username)
+                    version = await file_catalog_service.get_version(username)
+                    handed_over = True
+                    answer = await self._run_agent(
+                        username, interaction.ask_stream, message, username, emit, history, version,
+                        reserved=True
+                    )
+                    await chat_history_service.add_exchange(username, message, answer)
+            except HTTPException as e:
+                emit({"type": "error", "content": e.detail})
+            except asyncio.TimeoutError:
+                emit({"type": "error", "content": "The assistant took too long to respond. Please try again."})
+            except Exception as e:
+                logger.error(f"Error in chat stream: {e}")
+                emit({"type": "error", "content": "I encountered an error while processing your message. Please try again."})
+            finally:
+                emit(None)
+        
+        def release_unless_handed_over(_):
+            # Also runs when the task is cancelled before it ever started
+            if not handed_over:
+                self._release_slot(username)
+        
+        task = asyncio.create_task(run())
+        task.add_done_callback(release_unless_handed_over)
+        
+        async def stream():
+            try:
+                while True:
+                    event = await events.get()
+                    if event is None:
+                        break
+                    yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            finally:
+                # Client went away, stop waiting on the agent
+                task.cancel()
+        
+        return stream()
+
+    async def get_stats(self):
         """
-        Get chat history for the current user
+        Hit/miss counters of the chat caches and memory use of the per-user indexes
+        """
+        # Stats never force the agents to be built
+        if not self.a2a_interaction:
+            return {"response_cache": None, "index_registry": None, "history": chat_history_service.stats()}
+        return {
+            "response_cache": self.a2a_interaction.response_cache.stats(),
+            "index_registry": self.a2a_interaction.index_registry.stats(),
+            "history": chat_history_service.stats()
+        }
+
+    async def get_chat_history(self, username: str, before: Optional[str] = None,
+                               limit: int = settings.CHAT_HISTORY_PAGE_SIZE):
+        """
+        Get a page of chat history for the current user, newest page first
         """
         try:
-            if not self.a2a_interaction:
-                return {"history": []}
-            
-            # Return the user-specific conversation history
-            return {"history": self.a2a_interaction.get_user_history(username)}
+            return await chat_history_service.get_history(username, before, limit)
         
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error getting chat history: {e}")
-            return {"history": []}
+            return {"history": [], "next_cursor": None}
 
     async def clear_chat_history(self, username: str):
         """
         Clear chat history for the current user
         """
         try:
-            if self.a2a_interaction:
-                self.a2a_interaction.clear_user_history(username)
+            await chat_history_service.clear(username)
             
             return {"message": "Chat history cleared successfully"}
         
@@ -87,78 +274,93 @@ class ChatService:
         Upload a file to the server for the current user
         """
         try:
-            # Create user-specific upload directory
-            user_upload_dir = os.path.join(settings.UPLOADS_DIR, username)
-            os.makedirs(user_upload_dir, exist_ok=True)
-            
-            # Read file content
-            file_content = await file.read()
-            file_name = file.filename
+            # Stream the upload into the user-specific directory, never holding it in memory
+            saved = await save_upload(
+                file,
+                os.path.join(settings.UPLOADS_DIR, username),
+                tmp_dir=settings.UPLOADS_TMP_DIR,
+                max_bytes=settings.MAX_UPLOAD_MB * 1024 * 1024,
+                chunk_size=settings.UPLOAD_CHUNK_SIZE,
+                blob_store=self.blob_store
+            )
             
-            # Save file to user-specific directory
-            file_path = os.path.join(user_upload_dir, file_name)
-            with open(file_path, "wb") as f:
-                f.write(file_content)
+            await file_catalog_service.record_upload(username, saved.filename, saved.size, saved.sha256)
+            # The file is on disk, other workers pick it up on their next question
+            version = await file_catalog_service.bump_version(username)
             
-            # Rebuild the user's index to include the new file
-            if self.a2a_interaction:
-                self.a2a_interaction.rebuild_user_index(username)
+            # Embed only the new file into the user's index
+            index_status = None
+            interaction = await self._get_interaction()
+            if interaction:
+                try:
+                    await self.agent_executor.run(
+                        interaction.index_user_file, username, saved.filename, saved.sha256, version
+                    )
+                    index_status = INDEX_INDEXED
+                except Exception as e:
+                    # The file is stored, indexing can be retried with a rebuild
+                    logger.error(f"Error indexing {saved.filename} for {username}: {e}")
+                    index_status = INDEX_FAILED
+                await file_catalog_service.set_index_status(username, saved.filename, index_status)
             
             return {
                 "message": "File uploaded successfully",
-                "filename": file_name,
+                "filename": saved.filename,
+                "size": saved.size,
+                "sha256": saved.sha256,
+                "index_status": index_status,
                 "user": username
             }
         
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error uploading file: {e}")
             raise HTTPException(status_code=500, detail="Failed to upload file")
 
-    async def get_user_files(self, username: str):
+    async def get_user_files(self, username: str, after: Optional[str] = None,
+                             limit: int = settings.FILES_PAGE_SIZE):
         """
-        Get list of uploaded files for the current user
+        Get a page of uploaded files for the current user from the file catalog
         """
         try:
-            user_upload_dir = os.path.join(settings.UPLOADS_DIR, username)
-            if not os.path.exists(user_upload_dir):
-                return {"files": []}
-            
-            files = []
-            for file_name in os.listdir(user_upload_dir):
-                file_path = os.path.join(user_upload_dir, file_name)
-                if os.path.isfile(file_path):
-                    file_stats = os.stat(file_path)
-                    files.append({
-                        "name": file_name,
-                        "size": file_stats.st_size,
-                        "uploaded_at": datetime.fromtimestamp(file_stats.st_mtime, tz=timezone.utc)
-                    })
-            
-            return {"files": files}
+            return await file_catalog_service.list_files(username, after, limit)
         
         except Exception as e:
             logger.error(f"Error getting user files: {e}")
-            return {"files": []}
+            return {"files": [], "next_cursor": None}
 
     async def delete_user_file(self, filename: str, username: str):
         """
         Delete a specific file for the current user
         """
         try:
+            filename = safe_filename(filename)
             user_upload_dir = os.path.join(settings.UPLOADS_DIR, username)
             file_path = os.path.join(user_upload_dir, filename)
             
-            if not os.path.exists(file_path):
-                raise HTTPException(status_code=404, detail="File not found")
+            record = await file_catalog_service.remove(username, filename)
+            try:
+                # Also frees the stored blob if no other user links to it, the
+                # catalogued hash saves reading the file to find its blob
+                await asyncio.to_thread(
+                    self.blob_store.release, file_path, record.get("sha256") if record else None
+                )
+            except FileNotFoundError:
+                if record is None:
+                    raise HTTPException(status_code=404, detail="File not found")
             
-            os.remove(file_path)
+            version = await file_catalog_service.bump_version(username)
             
-            # Rebuild the user's index after file deletion
-            if self.a2a_interaction:
-                self.a2a_interaction.rebuild_user_index(username)
+            # Drop only the deleted file's nodes from the user's index
+            interaction = await self._get_interaction()
+            if interaction:
+                await self.agent_executor.run(interaction.remove_user_file, username, filename, version)
             
             return {"message": f"File {filename} deleted successfully"}
         
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error deleting file: {e}")
             raise HTTPException(status_code=500, detail="Failed to delete file")
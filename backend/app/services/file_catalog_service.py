@@ -0,0 +1,222 @@
+from datetime import datetime, timezone
+from typing import Optional
+from pymongo import UpdateOne
+from ..config.database import get_database
+from ..config.redis import get_redis
+from ..config.settings import settings
+import asyncio
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+FILE_PROJECTION = {"_id": 0, "filename": 1, "size": 1, "sha256": 1, "uploaded_at": 1, "index_status": 1}
+
+# index_status values
+INDEX_PENDING = "pending"
+INDEX_INDEXED = "indexed"
+INDEX_FAILED = "failed"
+# Files found on disk by the backfill, indexed by an earlier version
+INDEX_UNKNOWN = "unknown"
+
+# Per-user counter bumped on every upload or delete, shared by all API workers
+DOCUMENTS_VERSION_KEY = "documents_version:{}"
+
+def _to_api(record: dict) -> dict:
+    return {
+        "name": record["filename"],
+        "size": record["size"],
+        "sha256": record.get("sha256"),
+        "uploaded_at": record["uploaded_at"],
+        "index_status": record.get("index_status", INDEX_UNKNOWN)
+    }
+
+def _scan_upload_dir(user_upload_dir: str) -> list:
+    """Metadata of files already on disk, runs in a thread"""
+    if not os.path.isdir(user_upload_dir):
+        return []
+    records = []
+    with os.scandir(user_upload_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                stats = entry.stat()
+                records.append({
+                    "filename": entry.name,
+                    "size": stats.st_size,
+                    "sha256": None,
+                    "uploaded_at": datetime.fromtimestamp(stats.st_mtime, tz=timezone.utc),
+                    "index_status": INDEX_UNKNOWN
+                })
+    return records
+
+class FileCatalogService:
+    """
+    Metadata of every user's uploads (name, size, content hash, upload time,
+    index status), kept in the user_files collection so listing never touches
+    the filesystem.
+    """
+
+    def __init__(self):
+        self.db = get_database()
+        self.redis = get_redis()
+        # Document versions when Redis is unavailable, only this process sees them
+        self._local_versions = {}
+
+    async def get_version(self, username: str) -> int:
+        """
+        Version of a user's documents, part of the chat response cache key
+        """
+        if self.redis.redis_connected:
+            try:
+                value = await self.redis.client.get(DOCUMENTS_VERSION_KEY.format(username))
+                return int(value) if value is not None else 0
+            except Exception as e:
+                logger.error(f"Failed to read documents version of {username}: {e}")
+        return self._local_versions.get(username, 0)
+
+    async def bump_version(self, username: str) -> int:
+        """
+        Mark a user's documents as changed, every worker's cached answers for them go stale
+        """
+        if self.redis.redis_connected:
+            try:
+                return await self.redis.client.incr(DOCUMENTS_VERSION_KEY.format(username))
+            except Exception as e:
+                logger.error(f"Failed to bump documents version of {username}: {e}")
+        version = self._local_versions.get(username, 0) + 1
+        self._local_versions[username] = version
+        return version
+
+    async def record_upload(self, username: str, filename: str, size: int, sha256: str):
+        record = {
+            "filename": filename,
+            "size": size,
+            "sha256": sha256,
+            "uploaded_at": datetime.now(timezone.utc),
+            "index_status": INDEX_PENDING
+        }
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            await self.db.user_files_collection.update_one(
+                {"username": username, "filename": filename},
+                {"$set": record},
+                upsert=True
+            )
+        else:
+            # Use in-memory storage
+            self.db.in_memory_user_files.setdefault(username, {})[filename] = record
+
+    async def set_index_status(self, username: str, filename: str, status: str):
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            await self.db.user_files_collection.update_one(
+                {"username": username, "filename": filename},
+                {"$set": {"index_status": status}}
+            )
+        else:
+            # Use in-memory storage
+            record = self.db.in_memory_user_files.get(username, {}).get(filename)
+            if record is not None:
+                record["index_status"] = status
+
+    async def remove(self, username: str, filename: str) -> Optional[dict]:
+        """
+        Drop a file's entry, returns the removed entry or None if it was not catalogued
+        """
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            return await self.db.user_files_collection.find_one_and_delete(
+                {"username": username, "filename": filename},
+                projection=FILE_PROJECTION
+            )
+        # Use in-memory storage
+        return self.db.in_memory_user_files.get(username, {}).pop(filename, None)
+
+    async def _claim_backfill(self, username: str) -> bool:
+        """
+        Mark a user's upload directory as checked for uncatalogued files,
+        True only for the one caller that should run the check
+        """
+        if self.db.mongodb_connected:
+            # Use MongoDB, the flag lives on the user so every worker sees it
+            claimed = await self.db.users_collection.find_one_and_update(
+                {"username": username, "files_backfilled": {"$ne": True}},
+                {"$set": {"files_backfilled": True}},
+                projection={"_id": 1}
+            )
+            return claimed is not None
+        # Use in-memory storage
+        user = self.db.in_memory_users.get(username)
+        if user is None or user.get("files_backfilled"):
+            return False
+        user["files_backfilled"] = True
+        return True
+
+    async def _release_backfill(self, username: str):
+        # The check failed, let a later listing retry it
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            await self.db.users_collection.update_one({"username": username}, {"$unset": {"files_backfilled": ""}})
+        else:
+            # Use in-memory storage
+            self.db.in_memory_users.get(username, {}).pop("files_backfilled", None)
+
+    async def _backfill(self, username: str):
+        """
+        Catalog files uploaded before the catalog existed, once per user
+        """
+        if not await self._claim_backfill(username):
+            return
+        try:
+            await self._catalog_existing(username)
+        except Exception:
+            await self._release_backfill(username)
+            raise
+
+    async def _catalog_existing(self, username: str):
+        records = await asyncio.to_thread(_scan_upload_dir, os.path.join(settings.UPLOADS_DIR, username))
+        if not records:
+            return
+        logger.info(f"Cataloguing {len(records)} existing uploads of {username}")
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            await self.db.user_files_collection.bulk_write([
+                UpdateOne({"username": username, "filename": record["filename"]}, {"$setOnInsert": record}, upsert=True)
+                for record in records
+            ], ordered=False)
+        else:
+            # Use in-memory storage
+            stored = self.db.in_memory_user_files.setdefault(username, {})
+            for record in records:
+                stored.setdefault(record["filename"], record)
+
+    async def list_files(self, username: str, after: Optional[str] = None,
+                         limit: int = settings.FILES_PAGE_SIZE) -> dict:
+        """
+        Keyset pagination ordered by file name, next_cursor is the last name returned
+        """
+        if after is None:
+            await self._backfill(username)
+
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            query = {"username": username}
+            if after:
+                query["filename"] = {"$gt": after}
+            # Fetch one extra file to know whether another page exists
+            cursor = self.db.user_files_collection.find(query, FILE_PROJECTION).sort("filename", 1).limit(limit + 1)
+            files = [_to_api(record) async for record in cursor]
+        else:
+            # Use in-memory storage
+            stored = self.db.in_memory_user_files.get(username, {})
+            names = sorted(name for name in stored if after is None or name > after)[:limit + 1]
+            files = [_to_api(stored[name]) for name in names]
+
+        has_more = len(files) > limit
+        files = files[:limit]
+        return {
+            "files": files,
+            "next_cursor": files[-1]["name"] if has_more else None
+        }
+
+file_catalog_service = FileCatalogService()
@@ -1,8 +1,10 @@
 from fastapi import HTTPException
 from datetime import datetime, timezone
-from typing import List
+from typing import AsyncIterator, List
 from ..models.task import Task, TaskCreate
+from ..models.user import AuthenticatedUser
 from ..config.database import get_database
+from ..config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,17 +13,16 @@ class TaskService:
     def __init__(self):
         self.db = get_database()
 
-    async def create_task(self, task: TaskCreate, username: str):
+    def _check_memory_user(self, user: AuthenticatedUser):
+        if user.username not in self.db.in_memory_users:
+            raise HTTPException(status_code=404, detail="User not found")
+
+    async def create_task(self, task: TaskCreate, user: AuthenticatedUser):
         if self.db.mongodb_connected:
-            # Use MongoDB
-            user = await self.db.users_collection.find_one({"username": username})
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            # Create task document
+            # Use MongoDB, the user id is already resolved by get_authenticated_user_record
             task_dict = task.model_dump()
             task_dict.update({
-                "user_id": str(user["_id"]),
+                "user_id": user.id,
                 "created_at": datetime.now(timezone.utc),
                 "updated_at": datetime.now(timezone.utc)
             })
@@ -33,48 +34,63 @@ class TaskService:
             return Task(**task_dict)
         else:
             # Use in-memory storage
-            user = self.db.in_memory_users.get(username)
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
+            self._check_memory_user(user)
             
             # Create task
             task_dict = task.model_dump()
             task_dict.update({
                 "id": str(self.db.task_counter),
-                "user_id": username,
+                "user_id": user.id,
                 "created_at": datetime.now(timezone.utc),
                 "updated_at": datetime.now(timezone.utc)
             })
             
-            if username not in self.db.in_memory_tasks:
-                self.db.in_memory_tasks[username] = []
+            if user.username not in self.db.in_memory_tasks:
+                self.db.in_memory_tasks[user.username] = []
             
-            self.db.in_memory_tasks[username].append(task_dict)
+            self.db.in_memory_tasks[user.username].append(task_dict)
             self.db.task_counter += 1
             
             return Task(**task_dict)
 
-    async def get_tasks(self, username: str) -> List[Task]:
+    async def get_tasks(self, user: AuthenticatedUser) -> List[Task]:
         if self.db.mongodb_connected:
             # Use MongoDB
-            user = await self.db.users_collection.find_one({"username": username})
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            # Get all tasks for the user
             tasks = []
-            async for task in self.db.tasks_collection.find({"user_id": str(user["_id"])}):
+            async for task in self.db.tasks_collection.find({"user_id": user.id}):
                 task["id"] = str(task.pop("_id"))
                 tasks.append(Task(**task))
             
             return tasks
         else:
             # Use in-memory storage
-            user = self.db.in_memory_users.get(username)
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
+            self._check_memory_user(user)
             
-            user_tasks = self.db.in_memory_tasks.get(username, [])
+            user_tasks = self.db.in_memory_tasks.get(user.username, [])
             return [Task(**task) for task in user_tasks]
 
-task_service = TaskService()
\ No newline at end of file
+    async def iter_tasks(self, user: AuthenticatedUser) -> AsyncIterator[dict]:
+        """
+        Validate the user up front, then return an iterator over their tasks
+        that reads straight from the cursor without building a list
+        """
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            return self._iter_mongo_tasks(user.id)
+        else:
+            # Use in-memory storage
+            self._check_memory_user(user)
+            
+            return self._iter_memory_tasks(user.username)
+
+    async def _iter_mongo_tasks(self, user_id: str) -> AsyncIterator[dict]:
+        cursor = self.db.tasks_collection.find({"user_id": user_id})
+        async for task in cursor.batch_size(settings.STREAM_BATCH_SIZE):
+            task["id"] = str(task.pop("_id"))
+            yield task
+
+    async def _iter_memory_tasks(self, username: str) -> AsyncIterator[dict]:
+        for task in list(self.db.in_memory_tasks.get(username, [])):
+            yield task
+
+task_service = TaskService()
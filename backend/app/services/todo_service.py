@@ -1,32 +1,86 @@
 from fastapi import HTTPException
-from typing import List
+from typing import AsyncIterator, List, Optional
 from datetime import datetime, timezone
 from ..models.todo import ToDo
 from ..config.database import get_database
+from ..config.settings import settings
+from ..utils.bulk import insert_many_chunked
+from ..utils.todo_stats import CELERY_CREATOR
+from .todo_stats_service import todo_stats_service
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Only the fields the API returns are read from MongoDB
+TODO_PROJECTION = {"name": 1, "is_completed": 1}
+
 class TodoService:
     def __init__(self):
         self.db = get_database()
 
-    async def get_todos(self) -> List[ToDo]:
+    async def get_todos(self, after: Optional[str] = None, limit: int = settings.TODOS_PAGE_SIZE) -> dict:
+        """
+        Keyset pagination ordered by id, next_cursor is the id of the last item
+        """
         if self.db.mongodb_connected:
             # Use MongoDB
+            query = {}
+            if after:
+                try:
+                    query["_id"] = {"$gt": ObjectId(after)}
+                except InvalidId:
+                    raise HTTPException(status_code=400, detail="Invalid cursor")
+            
+            # Fetch one extra document to know whether another page exists
+            cursor = self.db.todos_collection.find(query, TODO_PROJECTION).sort("_id", 1).limit(limit + 1)
+            todos = [
+                {
+                    "id": str(todo["_id"]),
+                    "name": todo["name"],
+                    "is_completed": todo["is_completed"]
+                }
+                async for todo in cursor
+            ]
+        else:
+            # Use in-memory storage
+            try:
+                after_id = int(after) if after else 0
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            
             todos = []
-            async for todo in self.db.todos_collection.find():
-                todo_dict = {
+            for todo in self.db.in_memory_todos:
+                if todo.id > after_id:
+                    todos.append(todo.model_dump())
+                    if len(todos) > limit:
+                        break
+        
+        has_more = len(todos) > limit
+        todos = todos[:limit]
+        return {
+            "items": todos,
+            "next_cursor": str(todos[-1]["id"]) if has_more else None
+        }
+
+    async def iter_todos(self) -> AsyncIterator[dict]:
+        """
+        Iterate every todo without materialising the whole collection
+        """
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            cursor = self.db.todos_collection.find({}, TODO_PROJECTION).sort("_id", 1)
+            async for todo in cursor.batch_size(settings.STREAM_BATCH_SIZE):
+                yield {
                     "id": str(todo["_id"]),
                     "name": todo["name"],
                     "is_completed": todo["is_completed"]
                 }
-                todos.append(ToDo(**todo_dict))
-            return todos
         else:
             # Use in-memory storage
-            return self.db.in_memory_todos
+            for todo in list(self.db.in_memory_todos):
+                yield todo.model_dump()
 
     async def get_todo(self, todo_id: int) -> ToDo:
         if self.db.mongodb_connected:
@@ -62,13 +116,57 @@ class TodoService:
             
             result = await self.db.todos_collection.insert_one(todo_dict)
             todo.id = str(result.inserted_id)
-            return todo
         else:
             # Use in-memory storage
             todo.id = self.db.todo_counter
             self.db.todo_counter += 1
             self.db.in_memory_todos.append(todo)
-            return todo
+        
+        await todo_stats_service.increment(total=1, completed=int(todo.is_completed))
+        return todo
+
+    async def create_todos_bulk(self, todos: List[ToDo], chunk_size: int = settings.TODOS_BULK_CHUNK_SIZE) -> dict:
+        """
+        Create many todos at once, reporting the id or the error of each item
+        """
+        if len(todos) > settings.TODOS_BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {settings.TODOS_BULK_MAX_ITEMS} todos can be created per request"
+            )
+        
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            now = datetime.now(timezone.utc)
+            documents = [
+                {
+                    "name": todo.name,
+                    "is_completed": todo.is_completed,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for todo in todos
+            ]
+            results = await insert_many_chunked(self.db.todos_collection, documents, chunk_size)
+        else:
+            # Use in-memory storage
+            results = []
+            for index, todo in enumerate(todos):
+                todo.id = self.db.todo_counter
+                self.db.todo_counter += 1
+                self.db.in_memory_todos.append(todo)
+                results.append({"index": index, "id": todo.id})
+        
+        failed = sum(1 for result in results if "error" in result)
+        await todo_stats_service.increment(
+            total=len(results) - failed,
+            completed=sum(1 for result in results if "error" not in result and todos[result["index"]].is_completed)
+        )
+        return {
+            "inserted": len(results) - failed,
+            "failed": failed,
+            "results": results
+        }
 
     async def update_todo(self, todo_id: int, updated_todo: ToDo) -> ToDo:
         if self.db.mongodb_connected:
@@ -80,16 +178,18 @@ class TodoService:
                     "updated_at": datetime.now(timezone.utc)
                 }
                 
-                result = await self.db.todos_collection.update_one(
+                # The previous completion state keeps the counters exact
+                previous = await self.db.todos_collection.find_one_and_update(
                     {"_id": ObjectId(str(todo_id))},
-                    {"$set": update_data}
+                    {"$set": update_data},
+                    projection={"is_completed": 1}
                 )
                 
-                if result.matched_count == 0:
+                if previous is None:
                     raise HTTPException(status_code=404, detail="Todo not found")
                 
                 updated_todo.id = str(todo_id)
-                return updated_todo
+                was_completed = previous.get("is_completed", False)
             except:
                 raise HTTPException(status_code=404, detail="Todo not found")
         else:
@@ -97,32 +197,49 @@ class TodoService:
             for i, todo in enumerate(self.db.in_memory_todos):
                 if todo.id == todo_id:
                     updated_todo.id = todo_id
+                    was_completed = todo.is_completed
                     self.db.in_memory_todos[i] = updated_todo
-                    return updated_todo
-            raise HTTPException(status_code=404, detail="Todo not found")
+                    break
+            else:
+                raise HTTPException(status_code=404, detail="Todo not found")
+        
+        await todo_stats_service.increment(completed=int(updated_todo.is_completed) - int(was_completed))
+        return updated_todo
 
     async def delete_todo(self, todo_id: int) -> ToDo:
         if self.db.mongodb_connected:
             # Use MongoDB
             try:
-                todo = await self.db.todos_collection.find_one({"_id": ObjectId(str(todo_id))})
+                todo = await self.db.todos_collection.find_one_and_delete(
+                    {"_id": ObjectId(str(todo_id))},
+                    projection={"name": 1, "is_completed": 1, "created_by": 1}
+                )
                 if not todo:
                     raise HTTPException(status_code=404, detail="Todo not found")
                 
-                await self.db.todos_collection.delete_one({"_id": ObjectId(str(todo_id))})
-                
-                return ToDo(
+                deleted = ToDo(
                     id=str(todo["_id"]),
                     name=todo["name"],
                     is_completed=todo["is_completed"]
                 )
+                created_by = todo.get("created_by")
             except:
                 raise HTTPException(status_code=404, detail="Todo not found")
         else:
             # Use in-memory storage
             for i, todo in enumerate(self.db.in_memory_todos):
                 if todo.id == todo_id:
-                    return self.db.in_memory_todos.pop(i)
-            raise HTTPException(status_code=404, detail="Todo not found")
+                    deleted = self.db.in_memory_todos.pop(i)
+                    created_by = None
+                    break
+            else:
+                raise HTTPException(status_code=404, detail="Todo not found")
+        
+        await todo_stats_service.increment(
+            total=-1,
+            completed=-int(deleted.is_completed),
+            celery_created=-int(created_by == CELERY_CREATOR)
+        )
+        return deleted
 
 todo_service = TodoService()
\ No newline at end of file
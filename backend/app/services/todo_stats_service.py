@@ -0,0 +1,93 @@
+from fastapi import HTTPException
+from ..config.database import get_database
+from ..config.redis import get_redis
+from ..utils.todo_stats import (
+    TODO_STATS_KEY, aggregate_counters, decode_counters, increment_counters, rebuild_counters, to_stats
+)
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TodoStatsService:
+    """
+    Materialised todo counters: a Redis hash shared with the Celery workers,
+    or process-local counters when Redis is unavailable. Writes increment them,
+    reads never scan the todos collection.
+    """
+
+    def __init__(self):
+        self.db = get_database()
+        self.redis = get_redis()
+        self._local = None
+        self._rebuild_task = None
+
+    async def _compute(self) -> dict:
+        if self.db.mongodb_connected:
+            # Use MongoDB
+            return await aggregate_counters(self.db.todos_collection)
+        # Use in-memory storage
+        todos = self.db.in_memory_todos
+        return {
+            "total": len(todos),
+            "completed": sum(1 for todo in todos if todo.is_completed),
+            # Celery only writes to MongoDB
+            "celery_created": 0
+        }
+
+    async def rebuild(self, only_if_missing: bool = False):
+        """
+        Recompute every counter with one aggregation and store the result
+        """
+        if only_if_missing and await self._read() is not None:
+            return
+        if self.redis.redis_connected and self.db.mongodb_connected:
+            # Other workers increment concurrently, only store a scan no write raced
+            counters, stored = await rebuild_counters(self.redis.client, self.db.todos_collection)
+            if not stored:
+                logger.warning("Todo counters changed during every rebuild attempt, keeping the current ones")
+                return
+        else:
+            # Computed without awaiting, no increment of this process can interleave
+            counters = await self._compute()
+            if self.redis.redis_connected:
+                await self.redis.client.hset(TODO_STATS_KEY, mapping=counters)
+            else:
+                self._local = counters
+        logger.info(f"Rebuilt todo counters: {counters}")
+
+    def _schedule_rebuild(self):
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self.rebuild())
+
+    async def _read(self):
+        if self.redis.redis_connected:
+            values = await self.redis.client.hgetall(TODO_STATS_KEY)
+            return decode_counters(values) if values else None
+        return dict(self._local) if self._local is not None else None
+
+    async def increment(self, total: int = 0, completed: int = 0, celery_created: int = 0):
+        try:
+            if self.redis.redis_connected:
+                await increment_counters(self.redis.client, total, completed, celery_created)
+            elif self._local is not None:
+                self._local["total"] += total
+                self._local["completed"] += completed
+                self._local["celery_created"] += celery_created
+        except Exception as e:
+            # Counters are reconciled by rebuild, a failed increment must not fail the write
+            logger.error(f"Failed to update todo counters: {e}")
+
+    async def get_stats(self) -> dict:
+        counters = await self._read()
+        if counters is None:
+            # Never aggregate on the request path, seed the counters in the background
+            self._schedule_rebuild()
+            raise HTTPException(
+                status_code=503,
+                detail="Todo statistics are being computed, please retry shortly",
+                headers={"Retry-After": "5"}
+            )
+        return to_stats(counters)
+
+todo_stats_service = TodoStatsService()
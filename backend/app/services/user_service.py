@@ -2,6 +2,7 @@ from fastapi import HTTPException
 from datetime import datetime, timezone
 from ..models.user import UserResponse
 from ..config.database import get_database
+from ..core.user_cache import user_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,26 +11,43 @@ class UserService:
     def __init__(self):
         self.db = get_database()
 
-    async def get_user_info(self, username: str):
+    async def resolve_user(self, username: str) -> dict:
+        """
+        Resolve a username to {id, username, created_at} through the user cache
+        """
+        user = user_cache.get(username)
+        if user is not None:
+            return user
+
         if self.db.mongodb_connected:
             # Use MongoDB
-            user = await self.db.users_collection.find_one({"username": username})
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            return UserResponse(
-                username=user["username"],
-                created_at=user.get("created_at", datetime.now(timezone.utc))
+            stored_user = await self.db.users_collection.find_one(
+                {"username": username},
+                {"username": 1, "created_at": 1}
             )
+            if not stored_user:
+                raise HTTPException(status_code=404, detail="User not found")
+            user_id = str(stored_user["_id"])
         else:
-            # Use in-memory storage
-            user = self.db.in_memory_users.get(username)
-            if not user:
+            # Use in-memory storage, tasks are keyed by username there
+            stored_user = self.db.in_memory_users.get(username)
+            if not stored_user:
                 raise HTTPException(status_code=404, detail="User not found")
-            
-            return UserResponse(
-                username=user["username"],
-                created_at=user.get("created_at", datetime.now(timezone.utc))
-            )
+            user_id = username
+        
+        user = {
+            "id": user_id,
+            "username": stored_user["username"],
+            "created_at": stored_user.get("created_at", datetime.now(timezone.utc))
+        }
+        user_cache.put(username, user)
+        return user
+
+    async def get_user_info(self, username: str):
+        user = await self.resolve_user(username)
+        return UserResponse(
+            username=user["username"],
+            created_at=user["created_at"]
+        )
 
 user_service = UserService()
\ No newline at end of file
@@ -0,0 +1,82 @@
+import hashlib
+import os
+from typing import Optional
+
+class BlobStore:
+    """
+    Content-addressed file store: each unique upload is kept once at
+    root/<sha256[:2]>/<sha256>, and a user's file is a hard link to its blob.
+
+    Readers (the per-user indexes, listings) keep seeing ordinary files in
+    uploads/<username>/. A blob is deleted when its last user link goes away.
+    Filesystems without hard links fall back to a private copy per user.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def store(self, tmp_path: str, sha256: str, dest_path: str):
+        """
+        Move a fully written temporary file into the store and link it to dest_path
+        """
+        blob = self.blob_path(sha256)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        # Overwriting a file may drop the last reference to its old blob
+        replaced_blob = self._sole_blob(dest_path) if os.path.exists(dest_path) else None
+        link_tmp = tmp_path + ".link"
+        try:
+            # Linking first means a concurrent release can never delete a blob we are using
+            os.link(blob, link_tmp)
+        except FileNotFoundError:
+            os.replace(tmp_path, blob)
+            try:
+                os.link(blob, link_tmp)
+            except OSError:
+                os.replace(blob, dest_path)
+                return
+        except OSError:
+            # No hard link support, keep the upload as a private file
+            os.replace(tmp_path, dest_path)
+            return
+        else:
+            # Identical content is already stored
+            os.remove(tmp_path)
+        os.replace(link_tmp, dest_path)
+        if replaced_blob:
+            self._remove_unreferenced(replaced_blob)
+
+    def _sole_blob(self, path: str, sha256: Optional[str] = None) -> Optional[str]:
+        """
+        The blob of path if path is its only user link, else None
+        """
+        if os.stat(path).st_nlink != 2:
+            return None
+        # The blob has to be found by content when the hash is not known
+        return self.blob_path(sha256 or file_sha256(path))
+
+    @staticmethod
+    def _remove_unreferenced(blob: str):
+        try:
+            if os.stat(blob).st_nlink == 1:
+                os.remove(blob)
+        except FileNotFoundError:
+            pass
+
+    def release(self, path: str, sha256: Optional[str] = None):
+        """
+        Remove a user's file, and its blob if no other user references it
+        """
+        blob = self._sole_blob(path, sha256)
+        os.remove(path)
+        if blob:
+            self._remove_unreferenced(blob)
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,32 @@
+from typing import List
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+
+async def insert_many_chunked(collection, documents: List[dict], chunk_size: int) -> List[dict]:
+    """
+    Insert documents in chunks of chunk_size with insert_many(ordered=False).
+
+    Returns one result per document, in input order: {"index", "id"} when it
+    was written, {"index", "error"} when it was rejected. A failing document
+    never stops the rest of its chunk or the following chunks.
+    """
+    results = []
+    for start in range(0, len(documents), chunk_size):
+        chunk = documents[start:start + chunk_size]
+        for document in chunk:
+            # Ids are assigned up front so successes are known even when the chunk partly fails
+            document.setdefault("_id", ObjectId())
+
+        errors = {}
+        try:
+            await collection.insert_many(chunk, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                errors[error["index"]] = error.get("errmsg", "write failed")
+
+        for offset, document in enumerate(chunk):
+            if offset in errors:
+                results.append({"index": start + offset, "error": errors[offset]})
+            else:
+                results.append({"index": start + offset, "id": str(document["_id"])})
+    return results
@@ -0,0 +1,67 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BoundedExecutor:
+    """
+    Thread pool with a hard limit on queued work.
+    Calls beyond max_workers + max_pending are rejected with 429 instead of queueing forever.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=self.name
+            )
+        return self._executor
+
+    def submit(self, func, *args, on_done=None) -> asyncio.Future:
+        """
+        Start func in the pool and return an awaitable future, raises 429 when saturated.
+        on_done is called on the event loop once the thread finishes, even if
+        the caller timed out or stopped waiting; it is not called on a 429.
+        """
+        # The counter is only touched from the event loop thread, so no lock is needed
+        if self._in_flight >= self.max_workers + self.max_pending:
+            logger.warning(f"{self.name} executor saturated ({self._in_flight} in flight)")
+            raise HTTPException(
+                status_code=429,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
+
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(func, *args)
+        self._in_flight += 1
+        # Release the slot when the thread finishes, not when the caller stops waiting,
+        # so timed out or cancelled work still counts against the limit
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, on_done))
+        return asyncio.wrap_future(future)
+
+    async def run(self, func, *args):
+        return await self.submit(func, *args)
+
+    def _release(self, on_done=None):
+        self._in_flight -= 1
+        if on_done is not None:
+            on_done()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
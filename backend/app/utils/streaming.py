@@ -0,0 +1,31 @@
+import json
+from typing import AsyncIterator
+
+def _dumps(document: dict) -> str:
+    return json.dumps(document, default=str, separators=(",", ":"))
+
+async def json_array_stream(documents: AsyncIterator[dict], batch_size: int = 100) -> AsyncIterator[str]:
+    """Serialise an async stream of documents as one JSON array, flushing every batch_size items"""
+    yield "["
+    batch = []
+    first = True
+    async for document in documents:
+        batch.append(_dumps(document))
+        if len(batch) >= batch_size:
+            yield ("" if first else ",") + ",".join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield ("" if first else ",") + ",".join(batch)
+    yield "]"
+
+async def ndjson_stream(documents: AsyncIterator[dict], batch_size: int = 100) -> AsyncIterator[str]:
+    """Serialise an async stream of documents as newline-delimited JSON, one chunk per batch_size lines"""
+    batch = []
+    async for document in documents:
+        batch.append(_dumps(document))
+        if len(batch) >= batch_size:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
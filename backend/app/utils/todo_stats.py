@@ -0,0 +1,93 @@
+"""
+Todo counters shared by the API and the Celery tasks
+
+The counters live in one Redis hash and are incremented on every write, so
+reading them never touches the todos collection. aggregate_counters recomputes
+them from scratch in a single pass, to seed or reconcile the hash.
+
+Every increment also bumps a write sequence. rebuild_counters only stores a
+recomputed result if the sequence did not move during the scan, so a
+reconcile never overwrites increments it may not have seen.
+"""
+
+from typing import Tuple
+
+TODO_STATS_KEY = "todo_stats"
+TODO_STATS_SEQ_KEY = "todo_stats:seq"
+# Scans retried when writes keep landing during the aggregation
+REBUILD_ATTEMPTS = 3
+# created_by value of the todos counted as celery_created
+CELERY_CREATOR = "celery_auto_task"
+COUNTER_FIELDS = ("total", "completed", "celery_created")
+
+# Increments apply only to an existing hash, a partially created hash would
+# look like valid counters; a missing one is seeded by a full rebuild.
+# The sequence is bumped either way, a seed running meanwhile must notice.
+INCREMENT_SCRIPT = """
+redis.call('INCR', KEYS[2])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HINCRBY', KEYS[1], 'total', ARGV[1])
+redis.call('HINCRBY', KEYS[1], 'completed', ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'celery_created', ARGV[3])
+return 1
+"""
+
+# Store recomputed counters only if no increment happened since ARGV[1] was read
+REPLACE_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'total', ARGV[2], 'completed', ARGV[3], 'celery_created', ARGV[4])
+return 1
+"""
+
+STATS_PIPELINE = [
+    {"$group": {
+        "_id": None,
+        "total": {"$sum": 1},
+        "completed": {"$sum": {"$cond": [{"$eq": ["$is_completed", True]}, 1, 0]}},
+        "celery_created": {"$sum": {"$cond": [{"$eq": ["$created_by", CELERY_CREATOR]}, 1, 0]}},
+    }}
+]
+
+async def aggregate_counters(collection) -> dict:
+    """Every counter in one scan of the collection"""
+    rows = await collection.aggregate(STATS_PIPELINE).to_list(length=1)
+    row = rows[0] if rows else {}
+    return {field: int(row.get(field, 0)) for field in COUNTER_FIELDS}
+
+async def increment_counters(redis, total: int = 0, completed: int = 0, celery_created: int = 0):
+    await redis.eval(INCREMENT_SCRIPT, 2, TODO_STATS_KEY, TODO_STATS_SEQ_KEY, total, completed, celery_created)
+
+async def rebuild_counters(redis, collection, attempts: int = REBUILD_ATTEMPTS) -> Tuple[dict, bool]:
+    """
+    Recompute the counters and store them unless writes raced the scan.
+    Returns the counters and whether they were stored.
+    """
+    for _ in range(attempts):
+        seq = await redis.get(TODO_STATS_SEQ_KEY) or b"0"
+        counters = await aggregate_counters(collection)
+        args = [counters[field] for field in COUNTER_FIELDS]
+        if await redis.eval(REPLACE_SCRIPT, 2, TODO_STATS_KEY, TODO_STATS_SEQ_KEY, seq, *args):
+            return counters, True
+    return counters, False
+
+def decode_counters(values: dict) -> dict:
+    """Redis HGETALL reply (bytes keys and values) to int counters"""
+    counters = {field: 0 for field in COUNTER_FIELDS}
+    for key, value in values.items():
+        key = key.decode() if isinstance(key, bytes) else key
+        if key in counters:
+            counters[key] = int(value)
+    return counters
+
+def to_stats(counters: dict) -> dict:
+    """Counters in the shape returned by /todos/stats and the get_todo_stats task"""
+    return {
+        "total_todos": counters["total"],
+        "completed_todos": counters["completed"],
+        "pending_todos": counters["total"] - counters["completed"],
+        "celery_created_todos": counters["celery_created"]
+    }
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import HTTPException, UploadFile
+from .blob_store import BlobStore
+
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+@dataclass
+class SavedUpload:
+    filename: str
+    path: str
+    size: int
+    sha256: str
+
+def safe_filename(filename: str) -> str:
+    """
+    Strip any directory part a client put in the filename
+    """
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if name in ("", ".", ".."):
+        raise HTTPException(status_code=400, detail="Invalid file name")
+    return name
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+async def save_upload(file: UploadFile, directory: str, tmp_dir: str, max_bytes: int, chunk_size: int,
+                      blob_store: Optional[BlobStore] = None) -> SavedUpload:
+    """
+    Copy an upload to directory in chunks, hashing as it goes.
+
+    Disk writes run in a thread, so the event loop never blocks on I/O and only
+    one chunk is held in memory. The file is written to a temporary name and
+    renamed into place once complete, readers never see a partial file.
+    tmp_dir must be on the same filesystem as directory. With a blob_store the
+    file is stored by content hash and directory only gets a link to it.
+    """
+    filename = safe_filename(file.filename)
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+    await asyncio.to_thread(os.makedirs, tmp_dir, exist_ok=True)
+    # Outside the user's directory, so listings and index syncs never pick up a partial file
+    fd, tmp_path = await asyncio.to_thread(tempfile.mkstemp, dir=tmp_dir, prefix="upload-")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        path = os.path.join(directory, filename)
+        if blob_store is not None:
+            await asyncio.to_thread(blob_store.store, tmp_path, digest.hexdigest(), path)
+        else:
+            await asyncio.to_thread(os.replace, tmp_path, path)
+    except BaseException:
+        await asyncio.to_thread(_remove_quietly, tmp_path)
+        raise
+
+    return SavedUpload(filename=filename, path=path, size=size, sha256=digest.hexdigest())
+
+class _BodyTooLarge(Exception):
+    pass
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject uploads over the limit before the multipart body is spooled to disk.
+    A Content-Length over the limit is refused from the headers alone; a chunked
+    body is counted as it is received and the request is aborted with a 413 as
+    soon as it goes over, whatever the multipart parser makes of the error.
+    """
+
+    def __init__(self, app, paths, max_bytes: int):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": _too_large(self.max_bytes).detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"].rstrip("/") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.max_bytes + MULTIPART_OVERHEAD_BYTES
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded and not started:
+                # Drop whatever error response the app made of the aborted body
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not started:
+            await self._reject(send)
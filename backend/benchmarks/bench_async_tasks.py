@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput of slow MongoDB tasks run one at a time, each with its
+own event loop and client (prefork, one task per process at a time), against
+AsyncTask coroutines overlapping on the shared worker loop (--pool threads)
+
+Needs a reachable MongoDB (MONGO_DB_URL), no broker or worker:
+    python -m benchmarks.bench_async_tasks --tasks 12 --sleep-ms 200 --threads 12
+
+Every task runs one find_one whose $where sleeps for --sleep-ms, so the server
+is busy while the client waits, like a slow query.
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from tasks import worker_db
+from tasks.async_task import AsyncTask
+from celery_app import celery_app
+
+BENCH_COLLECTION = "bench_async_tasks"
+
+
+async def slow_query(db, sleep_ms):
+    return await db[BENCH_COLLECTION].find_one({"$where": f"sleep({sleep_ms}) || true"})
+
+
+@celery_app.task(base=AsyncTask, name="benchmarks.bench_async_tasks.slow_task")
+async def slow_task(sleep_ms):
+    await slow_query(worker_db.get_db(), sleep_ms)
+
+
+def prefork_task(sleep_ms):
+    """What a prefork task did: new loop and client, work, close"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    client = AsyncIOMotorClient(worker_db.MONGO_DB_URL, serverSelectionTimeoutMS=5000)
+    try:
+        loop.run_until_complete(slow_query(client.todo, sleep_ms))
+    finally:
+        client.close()
+        loop.close()
+
+
+def measure(label, tasks, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {tasks} tasks in {elapsed:6.2f}s  {tasks / elapsed:8.1f} tasks/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=12)
+    parser.add_argument("--sleep-ms", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=12, help="pool threads, like --concurrency")
+    args = parser.parse_args()
+
+    worker_db.init_worker_db()
+    try:
+        worker_db.run(worker_db.get_db()[BENCH_COLLECTION].replace_one({"_id": 1}, {"_id": 1}, upsert=True))
+
+        measure("prefork, per-task loop", args.tasks,
+                lambda: [prefork_task(args.sleep_ms) for _ in range(args.tasks)])
+        measure("AsyncTask, serial", args.tasks,
+                lambda: [slow_task.apply(args=(args.sleep_ms,)).get() for _ in range(args.tasks)])
+
+        def overlapped():
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                futures = [pool.submit(lambda: slow_task.apply(args=(args.sleep_ms,)).get())
+                           for _ in range(args.tasks)]
+                for future in futures:
+                    future.result()
+        measure(f"AsyncTask, {args.threads} threads", args.tasks, overlapped)
+        print(f"in-flight limit on the shared loop: CELERY_ASYNC_CONCURRENCY={worker_db.ASYNC_CONCURRENCY}")
+
+        worker_db.run(worker_db.get_db()[BENCH_COLLECTION].drop())
+    finally:
+        worker_db.close_worker_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: todo creation throughput, one POST /todos/ per todo against
+POST /todos/bulk, and the create_todos_bulk task body run in-process
+
+Start the API first (uvicorn main:app), then run:
+    python -m benchmarks.bench_bulk_todos --base-url http://localhost:8000 --sizes 10000 100000
+
+The one-by-one path is sampled (--single-sample requests) and reported as a
+rate; pass --celery to also time the Celery task body against MONGO_DB_URL.
+"""
+
+import argparse
+import time
+
+import requests
+
+from benchmarks.bench_export_ttfb import login
+
+BENCH_PREFIX = "bench bulk"
+
+
+def single_rate(base_url, headers, count):
+    session = requests.Session()
+    start = time.perf_counter()
+    for i in range(count):
+        session.post(f"{base_url}/todos/", json={"name": f"{BENCH_PREFIX} single {i}", "is_completed": False},
+                     headers=headers).raise_for_status()
+    return count / (time.perf_counter() - start)
+
+
+def bulk_api(base_url, headers, size, batch):
+    session = requests.Session()
+    failed = 0
+    start = time.perf_counter()
+    for offset in range(0, size, batch):
+        items = [{"name": f"{BENCH_PREFIX} {i}", "is_completed": False}
+                 for i in range(offset, min(size, offset + batch))]
+        response = session.post(f"{base_url}/todos/bulk", json={"items": items}, headers=headers)
+        response.raise_for_status()
+        failed += response.json()["failed"]
+    return size / (time.perf_counter() - start), failed
+
+
+def bulk_celery(size, chunk_size):
+    from tasks import worker_db
+    from tasks.todo_task import create_todos_in_db
+
+    items = [f"{BENCH_PREFIX} celery {i}" for i in range(size)]
+    start = time.perf_counter()
+    results = worker_db.run(create_todos_in_db(items, user_id="bench", chunk_size=chunk_size))
+    rate = size / (time.perf_counter() - start)
+
+    async def cleanup():
+        await worker_db.get_db().todos.delete_many({"user_id": "bench", "created_by": "celery_bulk_task"})
+    worker_db.run(cleanup())
+    return rate, sum(1 for result in results if "error" in result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--batch", type=int, default=5000, help="todos per /todos/bulk request")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="insert_many chunk size for --celery")
+    parser.add_argument("--single-sample", type=int, default=1000)
+    parser.add_argument("--celery", action="store_true")
+    args = parser.parse_args()
+
+    headers = login(args.base_url)
+    rate = single_rate(args.base_url, headers, args.single_sample)
+    print(f"POST /todos/ one by one   {rate:10.1f} todos/sec (sampled over {args.single_sample})")
+    for size in args.sizes:
+        print(f"  ~{size / rate:8.1f}s projected for {size} todos")
+
+    for size in args.sizes:
+        rate, failed = bulk_api(args.base_url, headers, size, args.batch)
+        print(f"POST /todos/bulk {size:>8}  {rate:10.1f} todos/sec  {size / rate:7.2f}s  failed={failed}")
+        if args.celery:
+            rate, failed = bulk_celery(size, args.chunk_size)
+            print(f"create_todos_bulk {size:>7}  {rate:10.1f} todos/sec  {size / rate:7.2f}s  failed={failed}")
+
+
+if __name__ == "__main__":
+    main()
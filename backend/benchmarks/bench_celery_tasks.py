@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tasks/sec of the todo task body with per-task setup (new event loop,
+new Motor client, ping, close) against the pooled per-process client and loop
+
+Needs a reachable MongoDB (MONGO_DB_URL), no broker or worker:
+    python -m benchmarks.bench_celery_tasks --tasks 500
+"""
+
+import argparse
+import time
+
+from tasks import worker_db
+from tasks.todo_task import create_todo_in_db
+
+BENCH_TODO_NAME = "bench celery task"
+
+
+def per_task_setup(todo_name):
+    """What every task used to do: new loop and client, ping, work, close"""
+    worker_db.init_worker_db()
+    try:
+        worker_db.run(create_todo_in_db(todo_name))
+    finally:
+        worker_db.close_worker_db()
+
+
+def pooled(todo_name):
+    worker_db.run(create_todo_in_db(todo_name))
+
+
+def measure(label, func, tasks):
+    start = time.perf_counter()
+    for _ in range(tasks):
+        func(BENCH_TODO_NAME)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {tasks} tasks in {elapsed:6.2f}s  {tasks / elapsed:8.1f} tasks/sec  "
+          f"{elapsed / tasks * 1000:7.2f} ms/task")
+
+
+def cleanup():
+    async def delete():
+        db = worker_db.get_db()
+        await db.todos.delete_many({"name": BENCH_TODO_NAME})
+    worker_db.run(delete())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=500)
+    args = parser.parse_args()
+
+    measure("per-task setup", per_task_setup, args.tasks)
+    worker_db.init_worker_db()
+    try:
+        measure("pooled", pooled, args.tasks)
+        cleanup()
+    finally:
+        worker_db.close_worker_db()
+
+
+if __name__ == "__main__":
+    main()
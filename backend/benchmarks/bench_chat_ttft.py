@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time-to-first-token of the streaming chat path vs the blocking path,
+run offline against a local stub LLM and a stub knowledge tool
+
+    python -m benchmarks.bench_chat_ttft
+"""
+
+import os
+import time
+
+# The real LlamaIndex agent is never built, but its module checks for a key on import
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from agents.agent_langchain import LangchainAgent
+
+RESPONSES = [
+    "Thought: I should look this up in the documents.\n"
+    "Action: LlamaIndex_Knowledge_Search\n"
+    "Action Input: what is this company about",
+    "Thought: I now know the final answer\n"
+    "Final Answer: The company builds a todo application with an AI assistant "
+    "that answers questions about uploaded documents.",
+]
+
+
+class StubChatModel(FakeListChatModel):
+    """Fake chat model that streams its canned responses character by character"""
+    streaming: bool = True
+
+
+class StubKnowledgeAgent:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def search(self, question: str) -> str:
+        time.sleep(self.delay)
+        return "The company builds todo software."
+
+    query_knowledge = search
+
+
+def build_agent(token_delay: float, tool_delay: float):
+    llm = StubChatModel(responses=RESPONSES, sleep=token_delay, streaming=True)
+    return LangchainAgent(llm=llm, llama_agent=StubKnowledgeAgent(tool_delay))
+
+
+def main(token_delay: float = 0.005, tool_delay: float = 0.3, runs: int = 5):
+    blocking, first_event, first_token, streamed_total = [], [], [], []
+
+    for _ in range(runs):
+        agent = build_agent(token_delay, tool_delay)
+        start = time.perf_counter()
+        agent.run("What is this company about?")
+        blocking.append(time.perf_counter() - start)
+
+        agent = build_agent(token_delay, tool_delay)
+        marks = {}
+        start = time.perf_counter()
+
+        def emit(event):
+            now = time.perf_counter() - start
+            marks.setdefault("event", now)
+            if event["type"] == "token":
+                marks.setdefault("token", now)
+
+        agent.stream("What is this company about?", emit)
+        streamed_total.append(time.perf_counter() - start)
+        first_event.append(marks.get("event", 0.0))
+        first_token.append(marks.get("token", 0.0))
+
+    def mean_ms(values):
+        return sum(values) / len(values) * 1000
+
+    print(f"blocking run, answer after:     {mean_ms(blocking):8.1f} ms")
+    print(f"stream, first event (step):     {mean_ms(first_event):8.1f} ms")
+    print(f"stream, first answer token:     {mean_ms(first_token):8.1f} ms")
+    print(f"stream, complete:               {mean_ms(streamed_total):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rebuilding an index over unchanged content with and without the
+on-disk embedding cache. Runs offline with the deterministic fake embedder.
+
+    python -m benchmarks.bench_embedding_cache
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from llama_index.core.llms import MockLLM
+
+from agents.agent_llamaindex import LlamaIndexAgent
+from agents.embedding_cache import CachedEmbedding, DeterministicEmbedding
+
+
+def write_docs(docs_dir, count):
+    for i in range(count):
+        with open(os.path.join(docs_dir, f"doc_{i:05d}.txt"), "w") as f:
+            f.write(f"Document {i}. " + "Handbook paragraph about the company. " * 300)
+
+
+def rebuild(docs_dir, index_dir, embed_model):
+    start = time.perf_counter()
+    LlamaIndexAgent(rebuild_index=True, docs_dir=docs_dir, index_dir=index_dir, llm=MockLLM(), embed_model=embed_model)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(file_count: int = 100):
+    root = tempfile.mkdtemp(prefix="bench_embed_cache_")
+    docs_dir = os.path.join(root, "docs")
+    os.makedirs(docs_dir)
+    write_docs(docs_dir, file_count)
+    try:
+        fake = DeterministicEmbedding(embed_dim=1536)
+        cached = CachedEmbedding(fake, cache_dir=os.path.join(root, "embedding_cache"))
+
+        for label in ("cold cache", "warm cache"):
+            fake.calls = 0
+            elapsed = rebuild(docs_dir, os.path.join(root, "index"), cached)
+            print(f"{label:<12} rebuild={elapsed:9.1f}ms embedding calls={fake.calls}")
+
+        stats = cached.cache.stats()
+        print(f"cache entries={stats['entries']} hits={stats['hits']} misses={stats['misses']}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time-to-first-byte and total time of the NDJSON export endpoints
+against the existing list endpoints
+
+Start the API first (uvicorn main:app), then run:
+    python -m benchmarks.bench_export_ttfb --base-url http://localhost:8000 --seed 100000
+"""
+
+import argparse
+import time
+import uuid
+
+import requests
+
+
+def login(base_url):
+    username = f"bench_{uuid.uuid4().hex[:8]}"
+    password = "bench-password"
+    requests.post(f"{base_url}/signup", json={"username": username, "password": password})
+    response = requests.post(f"{base_url}/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def seed(base_url, headers, count):
+    """Create todos and tasks through the public API"""
+    session = requests.Session()
+    for i in range(count):
+        session.post(f"{base_url}/todos/", json={"name": f"bench todo {i}", "is_completed": False}, headers=headers)
+        session.post(f"{base_url}/tasks", json={"title": f"bench task {i}", "description": "seeded"}, headers=headers)
+
+
+def measure(url, headers, params=None):
+    start = time.perf_counter()
+    with requests.get(url, headers=headers, params=params, stream=True) as response:
+        response.raise_for_status()
+        chunks = response.iter_content(chunk_size=None)
+        first = next(chunks, b"")
+        ttfb = time.perf_counter() - start
+        size = len(first)
+        for chunk in chunks:
+            size += len(chunk)
+    total = time.perf_counter() - start
+    return ttfb * 1000, total * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--seed", type=int, default=0, help="number of todos/tasks to create first")
+    args = parser.parse_args()
+
+    headers = login(args.base_url)
+    if args.seed:
+        seed(args.base_url, headers, args.seed)
+
+    cases = [
+        ("GET /todos/?stream=true", f"{args.base_url}/todos/", {"stream": "true"}),
+        ("GET /todos/export", f"{args.base_url}/todos/export", None),
+        ("GET /tasks", f"{args.base_url}/tasks", None),
+        ("GET /tasks/export", f"{args.base_url}/tasks/export", None),
+    ]
+    for label, url, params in cases:
+        ttfb, total, size = measure(url, headers, params)
+        print(f"{label:<26} ttfb={ttfb:9.2f}ms total={total:9.2f}ms bytes={size}")
+
+
+if __name__ == "__main__":
+    main()
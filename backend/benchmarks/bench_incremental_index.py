@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of indexing one more uploaded file as the user's file count grows,
+incremental upsert vs full rebuild. Runs offline with a mock embedder and counts
+embedding calls.
+
+    python -m benchmarks.bench_incremental_index
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.llms import MockLLM
+
+from agents.agent_llamaindex import LlamaIndexAgent
+
+
+class CountingEmbedding(MockEmbedding):
+    """Mock embedder that counts how many texts it was asked to embed"""
+    calls: int = 0
+
+    def _get_text_embedding(self, text):
+        self.calls += 1
+        return super()._get_text_embedding(text)
+
+    def _get_text_embeddings(self, texts):
+        self.calls += len(texts)
+        return super()._get_text_embeddings(texts)
+
+
+def write_file(docs_dir, i):
+    name = f"doc_{i:05d}.txt"
+    with open(os.path.join(docs_dir, name), "w") as f:
+        f.write(f"Document {i}. " + "Some uploaded handbook text. " * 200)
+    return name
+
+
+def main(checkpoints=(10, 50, 100, 200)):
+    root = tempfile.mkdtemp(prefix="bench_index_")
+    docs_dir = os.path.join(root, "docs")
+    index_dir = os.path.join(root, "index")
+    os.makedirs(docs_dir)
+    embed_model = CountingEmbedding(embed_dim=256)
+    try:
+        agent = LlamaIndexAgent(docs_dir=docs_dir, index_dir=index_dir, llm=MockLLM(), embed_model=embed_model)
+        count = 0
+        print(f"{'files':>6} {'upsert ms':>10} {'upsert embeds':>14} {'rebuild ms':>11} {'rebuild embeds':>15}")
+        for target in checkpoints:
+            while count < target - 1:
+                agent.upsert_file(write_file(docs_dir, count))
+                count += 1
+
+            name = write_file(docs_dir, count)
+            count += 1
+            embed_model.calls = 0
+            start = time.perf_counter()
+            agent.upsert_file(name)
+            upsert_ms = (time.perf_counter() - start) * 1000
+            upsert_embeds = embed_model.calls
+
+            embed_model.calls = 0
+            start = time.perf_counter()
+            LlamaIndexAgent(rebuild_index=True, docs_dir=docs_dir, index_dir=index_dir + "_full",
+                            llm=MockLLM(), embed_model=embed_model)
+            rebuild_ms = (time.perf_counter() - start) * 1000
+            print(f"{count:>6} {upsert_ms:>10.1f} {upsert_embeds:>14} {rebuild_ms:>11.1f} {embed_model.calls:>15}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
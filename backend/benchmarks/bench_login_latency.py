@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /todos/ latency while /login is hammered
+
+Start the API first (uvicorn main:app), then run:
+    python -m benchmarks.bench_login_latency --base-url http://localhost:8000
+"""
+
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def create_user(base_url):
+    username = f"bench_{uuid.uuid4().hex[:8]}"
+    password = "bench-password"
+    requests.post(f"{base_url}/signup", json={"username": username, "password": password})
+    response = requests.post(f"{base_url}/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return username, password, response.json()["access_token"]
+
+
+def measure_todos(base_url, token, duration):
+    """Poll /todos/ sequentially and return per-request latencies in ms"""
+    latencies = []
+    session = requests.Session()
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        session.get(f"{base_url}/todos/", headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def hammer_login(base_url, username, password, stop_event, counters):
+    session = requests.Session()
+    while not stop_event.is_set():
+        response = session.post(f"{base_url}/login", json={"username": username, "password": password})
+        counters[response.status_code] = counters.get(response.status_code, 0) + 1
+
+
+def report(label, latencies):
+    print(
+        f"{label:<22} n={len(latencies):<6} "
+        f"p50={percentile(latencies, 50):7.2f}ms "
+        f"p99={percentile(latencies, 99):7.2f}ms "
+        f"mean={statistics.fmean(latencies) if latencies else 0:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--login-clients", type=int, default=32)
+    args = parser.parse_args()
+
+    username, password, token = create_user(args.base_url)
+
+    baseline = measure_todos(args.base_url, token, args.duration)
+    report("/todos/ idle", baseline)
+
+    stop_event = threading.Event()
+    counters = {}
+    with ThreadPoolExecutor(max_workers=args.login_clients) as pool:
+        for _ in range(args.login_clients):
+            pool.submit(hammer_login, args.base_url, username, password, stop_event, counters)
+        under_load = measure_todos(args.base_url, token, args.duration)
+        stop_event.set()
+
+    report("/todos/ under /login", under_load)
+    print(f"/login status codes: {counters}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: response cache lookup latency (exact and normalised hits, and the
+cost of an embedding-similarity lookup) against a stubbed agent call
+
+    python -m benchmarks.bench_response_cache
+
+DeterministicEmbedding vectors are random per text, so the similarity lookup
+is timed on misses only; its hit rate says nothing without a real embedder.
+"""
+
+import time
+
+from agents.embedding_cache import DeterministicEmbedding
+from agents.response_cache import ResponseCache
+
+QUESTIONS = [f"What does team {i} work on?" for i in range(500)]
+
+
+def slow_agent(question: str) -> str:
+    # Stand-in for a ReAct loop plus retrieval and synthesis
+    time.sleep(1.5)
+    return f"Answer to: {question}"
+
+
+def time_lookups(cache, questions, repeat=5):
+    start = time.perf_counter()
+    hits = 0
+    for _ in range(repeat):
+        for question in questions:
+            hits += cache.get("bench_user", 0, question) is not None
+    elapsed = (time.perf_counter() - start) / (repeat * len(questions)) * 1000
+    return elapsed, hits / (repeat * len(questions))
+
+
+def main():
+    start = time.perf_counter()
+    slow_agent(QUESTIONS[0])
+    print(f"agent call (stub):        {(time.perf_counter() - start) * 1000:9.3f} ms")
+
+    exact = ResponseCache(max_entries=1000)
+    embedder = DeterministicEmbedding(embed_dim=1536)
+    semantic = ResponseCache(max_entries=1000, similarity_threshold=0.95, embed_fn=embedder.get_query_embedding)
+    for cache in (exact, semantic):
+        for question in QUESTIONS:
+            cache.put("bench_user", 0, question, f"Answer to: {question}")
+
+    # Different casing and punctuation still hit the exact key after normalisation
+    variants = [question.upper().replace("?", " ?!") for question in QUESTIONS]
+    for label, cache, questions in (
+        ("exact hit", exact, QUESTIONS),
+        ("normalised hit", exact, variants),
+    ):
+        ms, rate = time_lookups(cache, questions)
+        print(f"{label:<25} {ms:9.3f} ms  hit rate={rate:.2f}")
+
+    # Embedding the question plus scoring every cached question of the user
+    ms, _ = time_lookups(semantic, [q + " please" for q in QUESTIONS])
+    print(f"{'similarity lookup (miss)':<25} {ms:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: application import time (python -X importtime) and
+time-to-first-/health of a freshly started uvicorn process
+
+    python -m benchmarks.bench_startup --import-budget-ms 1500 --health-budget-ms 3000
+
+Exits non-zero when either measurement is over budget.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), name[1:]))
+    # Top-level imports are the ones without indentation
+    total_us = sum(cumulative for cumulative, name in rows if not name.startswith(" "))
+    slowest = sorted(((c, n.strip()) for c, n in rows), reverse=True)[:top]
+    return total_us / 1000, slowest, result.returncode
+
+
+def measure_health(port: int, timeout: float):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR
+    )
+    start = time.perf_counter()
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                    return (time.perf_counter() - start) * 1000
+            except requests.RequestException:
+                pass
+            time.sleep(0.02)
+        return None
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--health-budget-ms", type=float, default=3000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    import_ms, slowest, returncode = measure_import(args.top)
+    if returncode:
+        print("import main failed, run 'python -c \"import main\"' for details")
+        return 1
+    print(f"import main: {import_ms:8.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+    for cumulative_us, name in slowest:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    health_ms = measure_health(args.port, timeout=30)
+    if health_ms is None:
+        print("/health did not answer within 30s")
+        return 1
+    print(f"first /health: {health_ms:8.1f} ms (budget {args.health_budget_ms:.0f} ms)")
+
+    over_budget = import_ms > args.import_budget_ms or health_ms > args.health_budget_ms
+    print("over budget" if over_budget else "within budget")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
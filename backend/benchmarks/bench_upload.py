@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: server peak RSS and /todos/ latency while large files are uploaded
+
+Start the API first (uvicorn main:app, without --reload so the PID is the
+worker), then run on the same host:
+    python -m benchmarks.bench_upload --base-url http://localhost:8000 --pid <uvicorn pid>
+
+Peak RSS is read from /proc/<pid>/status (VmHWM), so it is Linux only.
+Start the server without OPENAI_API_KEY to measure the upload path alone,
+otherwise every upload is also embedded into the user's index.
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.bench_login_latency import create_user, measure_todos, report
+
+
+def read_rss_kb(pid):
+    """Current and peak resident set size of a process in kB"""
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                values[key] = int(value.split()[0])
+    return values.get("VmRSS", 0), values.get("VmHWM", 0)
+
+
+def make_file(size_mb):
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    block = (b"benchmark upload line\n" * 48000)[:1024 * 1024]
+    with os.fdopen(fd, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+    return path
+
+
+def upload(base_url, token, path, index):
+    with open(path, "rb") as f:
+        response = requests.post(
+            f"{base_url}/chat/upload",
+            headers={"Authorization": f"Bearer {token}"},
+            files={"file": (f"bench_upload_{index}.txt", f, "text/plain")},
+        )
+    return response.status_code
+
+
+def sample_rss(pid, stop_event, samples):
+    while not stop_event.is_set():
+        samples.append(read_rss_kb(pid)[0])
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--pid", type=int, required=True, help="PID of the API server process")
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--uploads", type=int, default=4, help="concurrent uploads")
+    parser.add_argument("--duration", type=float, default=5.0, help="idle latency sampling time")
+    args = parser.parse_args()
+
+    _, _, token = create_user(args.base_url)
+    path = make_file(args.size_mb)
+    try:
+        report("/todos/ idle", measure_todos(args.base_url, token, args.duration))
+        rss_before, _ = read_rss_kb(args.pid)
+
+        stop_event = threading.Event()
+        rss_samples = []
+        sampler = threading.Thread(target=sample_rss, args=(args.pid, stop_event, rss_samples), daemon=True)
+        sampler.start()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.uploads) as pool:
+            futures = [pool.submit(upload, args.base_url, token, path, i) for i in range(args.uploads)]
+            latencies = []
+            session = requests.Session()
+            headers = {"Authorization": f"Bearer {token}"}
+            while not all(future.done() for future in futures):
+                request_start = time.perf_counter()
+                session.get(f"{args.base_url}/todos/", headers=headers)
+                latencies.append((time.perf_counter() - request_start) * 1000)
+            statuses = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        stop_event.set()
+        sampler.join()
+
+        report("/todos/ during uploads", latencies)
+        _, rss_peak = read_rss_kb(args.pid)
+        print(f"uploads: {args.uploads} x {args.size_mb} MB in {elapsed:.1f}s, status codes {statuses}")
+        print(f"server RSS before: {rss_before / 1024:.1f} MB, "
+              f"max sampled during uploads: {max(rss_samples, default=0) / 1024:.1f} MB, "
+              f"process peak (VmHWM): {rss_peak / 1024:.1f} MB")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: load time and top-k query time of the JSON SimpleVectorStore
+against MmapVectorStore at 10k and 100k chunks
+
+    python -m benchmarks.bench_vector_store --dim 384
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores import SimpleVectorStore
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from agents.mmap_vector_store import MmapVectorStore
+
+
+def make_nodes(count, dim, rng):
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return [
+        TextNode(id_=f"node-{i}", text="", embedding=vectors[i].tolist())
+        for i in range(count)
+    ]
+
+
+def time_queries(store, dim, rng, runs=50):
+    queries = rng.standard_normal((runs, dim)).astype(np.float32)
+    start = time.perf_counter()
+    for query in queries:
+        store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=3))
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def bench(count, dim, root):
+    rng = np.random.default_rng(0)
+    nodes = make_nodes(count, dim, rng)
+    results = {}
+
+    json_dir = os.path.join(root, f"json_{count}")
+    os.makedirs(json_dir)
+    json_path = os.path.join(json_dir, "default__vector_store.json")
+    simple = SimpleVectorStore()
+    simple.add(nodes)
+    simple.persist(persist_path=json_path)
+    start = time.perf_counter()
+    simple = SimpleVectorStore.from_persist_path(json_path)
+    results["json"] = ((time.perf_counter() - start) * 1000, time_queries(simple, dim, rng), os.path.getsize(json_path))
+
+    mmap_dir = os.path.join(root, f"mmap_{count}")
+    os.makedirs(mmap_dir)
+    store = MmapVectorStore()
+    store.add(nodes)
+    store.persist(persist_path=os.path.join(mmap_dir, "default__vector_store.json"))
+    start = time.perf_counter()
+    store = MmapVectorStore.from_persist_dir(mmap_dir)
+    load_ms = (time.perf_counter() - start) * 1000
+    size = sum(
+        os.path.getsize(os.path.join(MmapVectorStore.store_dir(mmap_dir), name))
+        for name in os.listdir(MmapVectorStore.store_dir(mmap_dir))
+    )
+    results["mmap"] = (load_ms, time_queries(store, dim, rng), size)
+
+    for backend, (load_ms, query_ms, size) in results.items():
+        print(f"{count:>7} {backend:<5} load={load_ms:10.1f}ms query={query_ms:8.2f}ms size={size / 1e6:8.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--counts", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_vector_store_")
+    try:
+        for count in args.counts:
+            bench(count, args.dim, root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,20 @@
 import os
-import asyncio
 from datetime import datetime, timezone
 from celery import Celery
-from redis import Redis
-from motor.motor_asyncio import AsyncIOMotorClient
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from app.utils.todo_stats import increment_counters
+from tasks.async_task import AsyncTask
+from tasks.worker_db import close_worker_db, get_db, get_redis, init_worker_db
 
 # Get Redis URL from environment variable
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
-MONGO_DB_URL = os.getenv('MONGO_DB_URL', 'mongodb://localhost:27017/todo')
 
 # Create Celery instance
 celery_app = Celery(
     'todo_app',
     broker=REDIS_URL,
     backend=REDIS_URL,
-    include=['celery_app']
+    include=['celery_app', 'tasks.todo_task']
 )
 
 # Configure Celery
@@ -27,22 +27,24 @@ celery_app.conf.update(
     result_expires=3600,
 )
 
+# One MongoDB client and event loop per worker process, see tasks/worker_db.py.
+# Run with --pool threads to overlap the I/O of concurrent tasks on that loop.
+worker_process_init.connect(init_worker_db)
+worker_process_shutdown.connect(close_worker_db)
+# The solo and threads pools have no child processes
+worker_shutdown.connect(close_worker_db)
+
 async def create_todo_in_database():
     """Create a todo item in MongoDB database"""
-    client = None
     try:
-        # Connect to MongoDB
-        client = AsyncIOMotorClient(MONGO_DB_URL, serverSelectionTimeoutMS=5000)
-        db = client.todo
-        
-        # Test connection
-        await client.admin.command('ping')
+        db = get_db()
         
         # Get a user to assign the todo to (or create system user)
         users_collection = db.users
-        users = await users_collection.find().to_list(length=None)
+        # Only the first user's _id is needed, never load every user document
+        user = await users_collection.find_one({}, {"_id": 1})
         
-        if not users:
+        if not user:
             # Create a system user if no users exist
             system_user = {
                 "username": "system",
@@ -53,7 +55,7 @@ async def create_todo_in_database():
             user_id = str(result.inserted_id)
         else:
             # Use the first available user
-            user_id = str(users[0]["_id"])
+            user_id = str(user["_id"])
         
         # Create todo document
         todo_doc = {
@@ -72,15 +74,12 @@ async def create_todo_in_database():
         
         print(f"✅ Created Redis todo with ID: {result.inserted_id}")
         
-        # Also store in Redis for caching
+        # Keep the shared todo counters in step
         try:
-            redis_client = Redis.from_url(REDIS_URL)
-            redis_client.incr('redis_todos_created')
-            total_created = redis_client.get('redis_todos_created')
-            print(f"📊 Total Redis todos created: {total_created.decode() if total_created else 0}")
+            await increment_counters(get_redis(), total=1)
         except Exception as redis_error:
             print(f"⚠️ Redis connection failed: {redis_error}")
-            # Continue without Redis stats
+            # Counters are reconciled by get_todo_stats
         
         return {
             "id": str(result.inserted_id),
@@ -93,24 +92,15 @@ async def create_todo_in_database():
     except Exception as e:
         print(f"❌ Error creating Redis todo: {str(e)}")
         raise e
-    finally:
-        if client:
-            client.close()
 
-@celery_app.task
-def create_redis_todo_task():
+@celery_app.task(base=AsyncTask)
+async def create_redis_todo_task():
     """Celery task that creates a todo with text 'Redis' every 10 seconds"""
     try:
-        # Run the async function
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            result = loop.run_until_complete(create_todo_in_database())
-            print(f"🎉 Successfully created Redis todo: {result}")
-            return result
-        finally:
-            loop.close()
+        # Runs on the worker's shared loop, see tasks/async_task.py
+        result = await create_todo_in_database()
+        print(f"🎉 Successfully created Redis todo: {result}")
+        return result
             
     except Exception as e:
         print(f"💥 Redis todo creation task failed: {str(e)}")
@@ -120,6 +110,8 @@ def create_redis_todo_task():
 @celery_app.on_after_configure.connect
 def setup_periodic_tasks(sender, **kwargs):
     sender.add_periodic_task(3600.0, create_redis_todo_task.s(), name='create-redis-todo-every-10-seconds')
+    # Reconcile the materialised todo counters with the collection
+    sender.add_periodic_task(3600.0, sender.signature('tasks.todo_task.get_todo_stats'), name='reconcile-todo-stats-hourly')
 
 if __name__ == '__main__':
     celery_app.start() 
\ No newline at end of file
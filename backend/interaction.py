@@ -1,18 +1,129 @@
 # interaction.py
 
+import os
+from contextlib import nullcontext
+
 from agents.agent_langchain import LangchainAgent
+from agents.agent_llamaindex import LlamaIndexAgent
+from agents.index_registry import UserIndexRegistry
+from agents.response_cache import ResponseCache, context_key
 
 
 class A2AInteraction:
-    def __init__(self):
+    def __init__(self, uploads_dir: str = "uploads", user_index_root: str = "indexes/users",
+                 response_cache_size: int = 1000, response_cache_similarity: float = None,
+                 index_memory_budget: int = 512 * 1024 * 1024):
         self.langchain_agent = LangchainAgent()
-        self.history = []
-
-    def ask(self, question: str) -> str:
-        self.history.append({"role": "user", "content": question})
-        
-        print("\n🤖 Запрашиваю ответ через Langchain-агента...\n")
-        answer = self.langchain_agent.run(question)
-        
-        self.history.append({"role": "agent", "content": answer})
+        self.uploads_dir = uploads_dir
+        self.user_index_root = user_index_root
+        # Per-user indexes over uploads/<username>, cold users are evicted under the budget
+        self.index_registry = UserIndexRegistry(self._build_user_index, max_bytes=index_memory_budget)
+        # Version of each user's documents this process has applied, part of the
+        # response cache key. Callers pass the shared version kept by the file catalog
+        self.index_versions = {}
+        self.response_cache = ResponseCache(
+            max_entries=response_cache_size,
+            similarity_threshold=response_cache_similarity,
+            embed_fn=lambda text: self.langchain_agent.llama_agent.embed_model.get_query_embedding(text)
+        )
+
+    def _documents_changed(self, username: str, version: int = None):
+        if version is None:
+            version = self.index_versions.get(username, 0) + 1
+        self.index_versions[username] = version
+        self.response_cache.invalidate_user(username)
+
+    def _catch_up(self, username: str, version: int = None) -> int:
+        """
+        Apply document changes another worker process made, returns the cache version
+        """
+        if version is None:
+            return self.index_versions.get(username, 0)
+        if self.index_versions.get(username, 0) != version:
+            if username in self.index_registry:
+                # A resident index predates the change, an evicted one is rebuilt from disk anyway
+                with self.user_index(username) as index:
+                    index.sync()
+                    self.index_registry.refresh(username)
+            self._documents_changed(username, version)
+        return version
+
+    def _build_user_index(self, username: str) -> LlamaIndexAgent:
+        # Every user index shares the clients built once for the shared agent
+        shared = self.langchain_agent.llama_agent
+        return LlamaIndexAgent(
+            docs_dir=os.path.join(self.uploads_dir, username),
+            index_dir=os.path.join(self.user_index_root, username),
+            llm=shared.llm,
+            embed_model=shared.embed_model
+        )
+
+    def user_index(self, username: str):
+        """Lease the user's index, it is not evicted while the block runs"""
+        return self.index_registry.lease(username)
+
+    def _has_uploads(self, username: str) -> bool:
+        user_dir = os.path.join(self.uploads_dir, username)
+        if not os.path.isdir(user_dir):
+            return False
+        with os.scandir(user_dir) as entries:
+            return any(entry.is_file() for entry in entries)
+
+    def _knowledge_for(self, username: str):
+        """The user's own index (leased) if they uploaded anything, otherwise the shared one"""
+        if username and self._has_uploads(username):
+            return self.user_index(username)
+        return nullcontext(self.langchain_agent.llama_agent)
+
+    def index_user_file(self, username: str, filename: str, content_hash: str = None, version: int = None):
+        """Embed a single uploaded file into the user's index, version is the documents version after it"""
+        with self.user_index(username) as index:
+            index.upsert_file(filename, content_hash)
+            self.index_registry.refresh(username)
+        self._documents_changed(username, version)
+
+    def remove_user_file(self, username: str, filename: str, version: int = None):
+        """Drop a deleted file's nodes from the user's index"""
+        with self.user_index(username) as index:
+            index.remove_file(filename)
+            self.index_registry.refresh(username)
+        self._documents_changed(username, version)
+
+    def rebuild_user_index(self, username: str, version: int = None):
+        """Full rebuild, only needed if the index got out of sync"""
+        with self.user_index(username) as index:
+            # In place, a second agent on the same index_dir would race this one's writes
+            index.rebuild()
+            self.index_registry.refresh(username)
+        self._documents_changed(username, version)
+
+    def ask(self, question: str, username: str = None, history=None, version: int = None) -> str:
+        """
+        history is the recent conversation, oldest first, already trimmed to the context budget.
+        version is the user's shared documents version, see _catch_up.
+        """
+        version = self._catch_up(username, version)
+        # The answer depends on the conversation too, not just the question
+        context = context_key(history)
+        answer = self.response_cache.get(username, version, question, context)
+        if answer is None:
+            print("\n🤖 Запрашиваю ответ через Langchain-агента...\n")
+            with self._knowledge_for(username) as llama_agent:
+                answer, ok = self.langchain_agent.run(question, llama_agent=llama_agent, history=history)
+            if ok:
+                # Error messages and degraded fallbacks are answered again next time
+                self.response_cache.put(username, version, question, answer, context)
+        return answer
+
+    def ask_stream(self, question: str, username: str = None, emit=None, history=None, version: int = None) -> str:
+        version = self._catch_up(username, version)
+        context = context_key(history)
+        answer = self.response_cache.get(username, version, question, context)
+        if answer is None:
+            with self._knowledge_for(username) as llama_agent:
+                answer, ok = self.langchain_agent.stream(question, emit, llama_agent=llama_agent, history=history)
+            if ok:
+                self.response_cache.put(username, version, question, answer, context)
+        else:
+            emit({"type": "final", "content": answer})
         return answer
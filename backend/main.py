@@ -1,13 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import asyncio
 import logging
 from dotenv import load_dotenv
 
 # Import structured app components
 from app.config.database import connect_to_mongo, close_mongo_connection
+from app.config.redis import connect_to_redis, close_redis_connection
 from app.config.settings import settings
+from app.core.security import password_executor
+from app.core.revocation import configure_revocation_store
+from app.services.chat_service import chat_service
+from app.services.todo_stats_service import todo_stats_service
 from app.utils.logger import logger
+from app.utils.uploads import UploadSizeLimitMiddleware
 
 # Import routers
 from app.routers import auth, users, todos, tasks, chat
@@ -22,6 +29,14 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Oversized uploads are refused from their headers, or as soon as a chunked body goes over
+# (added first so the CORS middleware still wraps the 413 response)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    paths=["/chat/upload"],
+    max_bytes=settings.MAX_UPLOAD_MB * 1024 * 1024
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -40,11 +55,20 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     await connect_to_mongo()
+    await connect_to_redis()
+    configure_revocation_store()
+    # Seed the todo counters with one aggregation if nothing has stored them yet
+    app.state.todo_stats_seed = asyncio.create_task(todo_stats_service.rebuild(only_if_missing=True))
+    # Build the chat agents and load the index without delaying startup
+    app.state.chat_warm_up = asyncio.create_task(chat_service.warm_up())
     logger.info("Application started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     await close_mongo_connection()
+    await close_redis_connection()
+    password_executor.shutdown()
+    chat_service.agent_executor.shutdown()
     logger.info("Application shutdown complete")
 
 # Include routers
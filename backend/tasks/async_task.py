@@ -0,0 +1,40 @@
+import contextvars
+import inspect
+from celery import Task
+from tasks.worker_db import run
+
+# Request of the task whose coroutine is running, per asyncio task on the shared loop
+_current_request = contextvars.ContextVar("celery_async_request", default=None)
+
+class AsyncTask(Task):
+    """
+    Base class for tasks written as coroutine functions
+
+        @celery_app.task(base=AsyncTask)
+        async def my_task(...):
+            ...
+
+    The coroutine runs on the worker process's shared event loop (see
+    tasks/worker_db.py) instead of a loop created for every invocation.
+    Calling the task directly or through apply() behaves the same way.
+    self.request (and so self.retry) works inside the coroutine, even though
+    Celery keeps requests in thread-locals of the pool thread.
+    """
+
+    abstract = True
+
+    @property
+    def request(self):
+        request = _current_request.get()
+        return request if request is not None else self._get_request()
+
+    async def _with_request(self, request, coro):
+        # Each coroutine is its own asyncio task, so concurrent tasks never see each other's request
+        _current_request.set(request)
+        return await coro
+
+    def __call__(self, *args, **kwargs):
+        result = super().__call__(*args, **kwargs)
+        if inspect.iscoroutine(result):
+            return run(self._with_request(self._get_request(), result))
+        return result
@@ -1,10 +1,12 @@
-import os
-import random
 from datetime import datetime, timezone
 from celery import current_app as celery_app
 from celery.utils.log import get_task_logger
-from motor.motor_asyncio import AsyncIOMotorClient
-import asyncio
+from app.config.settings import settings
+from app.utils.bulk import insert_many_chunked
+from app.utils.todo_stats import CELERY_CREATOR, rebuild_counters, to_stats
+from app.utils.todo_stats import increment_counters as increment_shared_counters
+from tasks.async_task import AsyncTask
+from tasks.worker_db import get_db, get_redis
 
 # Get logger for this task
 logger = get_task_logger(__name__)
@@ -53,33 +55,31 @@ RANDOM_TODO_TASKS = [
     "Research local events"
 ]
 
-async def get_database_connection():
-    """Get MongoDB connection"""
-    mongo_url = os.getenv('MONGO_DB_URL', 'mongodb://localhost:27017/todo')
-    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
-    db = client.todo
-    return client, db
+async def increment_counters(total: int = 0, completed: int = 0, celery_created: int = 0):
+    """Keep the shared todo counters (see app/utils/todo_stats.py) in step with writes"""
+    try:
+        await increment_shared_counters(get_redis(), total, completed, celery_created)
+    except Exception as e:
+        # get_todo_stats reconciles the counters
+        logger.warning(f"Failed to update todo counters: {e}")
 
 async def create_todo_in_db(todo_name: str):
     """Create a todo in the database"""
-    client = None
     try:
-        client, db = await get_database_connection()
-        
-        # Test connection
-        await client.admin.command('ping')
+        # Pooled client of this worker process
+        db = get_db()
         
-        # Get users collection to find a user to assign the todo to
-        users_collection = db.users
-        users = await users_collection.find().to_list(length=None)
+        # Pick a random user server-side, only its _id leaves the database
+        sampled = await db.users.aggregate([
+            {"$sample": {"size": 1}},
+            {"$project": {"_id": 1}}
+        ]).to_list(length=1)
         
-        if not users:
+        if not sampled:
             logger.warning("No users found in database, creating todo without user assignment")
             user_id = "system"
         else:
-            # Pick a random user
-            random_user = random.choice(users)
-            user_id = str(random_user["_id"])
+            user_id = str(sampled[0]["_id"])
         
         # Create todo document
         todo_doc = {
@@ -88,7 +88,7 @@ async def create_todo_in_db(todo_name: str):
             "user_id": user_id,
             "created_at": datetime.now(timezone.utc),
             "updated_at": datetime.now(timezone.utc),
-            "created_by": "celery_auto_task"
+            "created_by": CELERY_CREATOR
         }
         
         # Insert into todos collection
@@ -96,6 +96,7 @@ async def create_todo_in_db(todo_name: str):
         result = await todos_collection.insert_one(todo_doc)
         
         logger.info(f"Created todo task: '{todo_name}' with ID: {result.inserted_id}")
+        await increment_counters(total=1, celery_created=1)
         
         return {
             "id": str(result.inserted_id),
@@ -108,12 +109,9 @@ async def create_todo_in_db(todo_name: str):
     except Exception as e:
         logger.error(f"Failed to create todo in database: {str(e)}")
         raise e
-    finally:
-        if client:
-            client.close()
 
-@celery_app.task(bind=True)
-def create_random_todo_task(self):
+@celery_app.task(bind=True, base=AsyncTask)
+async def create_random_todo_task(self):
     """
     Celery task that creates a todo with text "redis" every minute
     """
@@ -121,106 +119,133 @@ def create_random_todo_task(self):
         # Create todo with "redis" text
         todo_text = "redis"
         
-        # Create the todo in database using asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Create the todo in database on the worker's shared loop
+        result = await create_todo_in_db(todo_text)
+        logger.info(f"Successfully created redis todo: {todo_text}")
         
-        try:
-            result = loop.run_until_complete(create_todo_in_db(todo_text))
-            logger.info(f"Successfully created redis todo: {todo_text}")
-            
-            return {
-                "status": "success",
-                "todo": result,
-                "task_id": str(self.request.id),
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            }
-        finally:
-            loop.close()
+        return {
+            "status": "success",
+            "todo": result,
+            "task_id": str(self.request.id),
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
             
     except Exception as e:
         logger.error(f"Redis todo creation task failed: {str(e)}")
         # Retry the task with exponential backoff
         raise self.retry(exc=e, countdown=60, max_retries=3)
 
-@celery_app.task
-def create_custom_todo_task(todo_name: str, user_id: str = None):
+@celery_app.task(base=AsyncTask)
+async def create_custom_todo_task(todo_name: str, user_id: str = None):
     """
     Manual task to create a custom todo
     Can be called manually for testing purposes
     """
     try:
-        # Create the todo in database using asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Create the todo in database on the worker's shared loop
+        result = await create_todo_in_db(todo_name)
+        logger.info(f"Successfully created custom todo: {todo_name}")
         
-        try:
-            result = loop.run_until_complete(create_todo_in_db(todo_name))
-            logger.info(f"Successfully created custom todo: {todo_name}")
-            
-            return {
-                "status": "success",
-                "todo": result,
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            }
-        finally:
-            loop.close()
+        return {
+            "status": "success",
+            "todo": result,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
             
     except Exception as e:
         logger.error(f"Custom todo creation task failed: {str(e)}")
         raise e
 
-@celery_app.task
-def get_todo_stats():
+async def create_todos_in_db(items: list, user_id: str = None, chunk_size: int = settings.TODOS_BULK_CHUNK_SIZE):
+    """Create many todos with chunked unordered inserts"""
+    # Same bound as POST /todos/bulk, for tasks queued directly
+    if len(items) > settings.TODOS_BULK_MAX_ITEMS:
+        raise ValueError(f"At most {settings.TODOS_BULK_MAX_ITEMS} items per bulk task, got {len(items)}")
+    
+    db = get_db()
+    
+    if user_id is None:
+        # One random owner for the whole batch, sampled server-side
+        sampled = await db.users.aggregate([
+            {"$sample": {"size": 1}},
+            {"$project": {"_id": 1}}
+        ]).to_list(length=1)
+        user_id = str(sampled[0]["_id"]) if sampled else "system"
+    
+    now = datetime.now(timezone.utc)
+    documents = []
+    # Input index of each document, invalid items are reported instead of inserted
+    positions = []
+    results = []
+    for index, item in enumerate(items):
+        # Items are plain names or {"name": ..., "is_completed": ...}
+        if isinstance(item, str):
+            item = {"name": item}
+        name = item.get("name") if isinstance(item, dict) else None
+        if not isinstance(name, str):
+            results.append({"index": index, "error": "Item has no name"})
+            continue
+        positions.append(index)
+        documents.append({
+            "name": name,
+            "is_completed": bool(item.get("is_completed", False)),
+            "user_id": user_id,
+            "created_at": now,
+            "updated_at": now,
+            "created_by": "celery_bulk_task"
+        })
+    
+    inserted = await insert_many_chunked(db.todos, documents, chunk_size) if documents else []
+    written = [documents[result["index"]] for result in inserted if "error" not in result]
+    results.extend({**result, "index": positions[result["index"]]} for result in inserted)
+    results.sort(key=lambda result: result["index"])
+    await increment_counters(total=len(written), completed=sum(1 for document in written if document["is_completed"]))
+    return results
+
+@celery_app.task(base=AsyncTask)
+async def create_todos_bulk(items: list, user_id: str = None, chunk_size: int = None):
     """
-    Task to get statistics about todos in the database
+    Create many todos in one task, written with insert_many in chunks.
+    Returns the id or the error of every item, in input order.
     """
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        results = await create_todos_in_db(items, user_id, chunk_size or settings.TODOS_BULK_CHUNK_SIZE)
+        failed = sum(1 for result in results if "error" in result)
+        logger.info(f"Bulk created {len(results) - failed} todos, {failed} failed")
         
-        async def get_stats():
-            client = None
-            try:
-                client, db = await get_database_connection()
-                await client.admin.command('ping')
-                
-                todos_collection = db.todos
-                
-                # Get total count
-                total_todos = await todos_collection.count_documents({})
-                
-                # Get completed count
-                completed_todos = await todos_collection.count_documents({"is_completed": True})
-                
-                # Get pending count
-                pending_todos = total_todos - completed_todos
-                
-                # Get todos created by celery
-                celery_todos = await todos_collection.count_documents({"created_by": "celery_auto_task"})
-                
-                return {
-                    "total_todos": total_todos,
-                    "completed_todos": completed_todos,
-                    "pending_todos": pending_todos,
-                    "celery_created_todos": celery_todos
-                }
-            finally:
-                if client:
-                    client.close()
+        return {
+            "status": "success" if not failed else "partial",
+            "inserted": len(results) - failed,
+            "failed": failed,
+            "results": results,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+    
+    except Exception as e:
+        logger.error(f"Bulk todo creation task failed: {str(e)}")
+        raise e
+
+@celery_app.task(base=AsyncTask)
+async def get_todo_stats():
+    """
+    Task to get statistics about todos in the database.
+    Counts everything in one aggregation and stores the result as the shared
+    counters behind /todos/stats, correcting any drift.
+    """
+    try:
+        counters, stored = await rebuild_counters(get_redis(), get_db().todos)
+        if not stored:
+            # Writes raced every scan, the stored counters are kept rather than overwritten
+            logger.warning("Todo counters changed during every rebuild attempt, not reconciled")
+        stats = to_stats(counters)
+        logger.info(f"Todo statistics: {stats}")
         
-        try:
-            stats = loop.run_until_complete(get_stats())
-            logger.info(f"Todo statistics: {stats}")
-            
-            return {
-                "status": "success",
-                "stats": stats,
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            }
-        finally:
-            loop.close()
+        return {
+            "status": "success" if stored else "not_reconciled",
+            "stats": stats,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
             
     except Exception as e:
         logger.error(f"Get todo stats task failed: {str(e)}")
-        raise e 
\ No newline at end of file
+        raise e
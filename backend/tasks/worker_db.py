@@ -0,0 +1,122 @@
+"""
+Per-process MongoDB client and event loop for Celery workers
+
+Opening a Motor client means TCP and handshake setup plus server selection, so
+each worker process creates one client and one event loop on
+worker_process_init and reuses them for every task. Both are created after the
+prefork fork, never shared between processes. Calling run() outside a worker
+(tests, scripts) initialises them lazily.
+
+The loop runs forever in a background thread. run() submits a coroutine to it
+and blocks the calling thread until it finishes, so with the threads pool
+(celery worker --pool threads) tasks from every pool thread share one loop and
+their I/O overlaps. At most CELERY_ASYNC_CONCURRENCY coroutines run at a time.
+"""
+
+import asyncio
+import os
+import threading
+from celery.utils.log import get_task_logger
+from motor.motor_asyncio import AsyncIOMotorClient
+from redis import asyncio as aioredis
+
+logger = get_task_logger(__name__)
+
+MONGO_DB_URL = os.getenv('MONGO_DB_URL', 'mongodb://localhost:27017/todo')
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+# Connections per worker process, tasks in one process share them
+MONGO_MAX_POOL_SIZE = int(os.getenv('CELERY_MONGO_MAX_POOL_SIZE', '10'))
+# Coroutines in flight on the shared loop of one worker process
+ASYNC_CONCURRENCY = int(os.getenv('CELERY_ASYNC_CONCURRENCY', '16'))
+
+class WorkerResources:
+    """Background event loop, Motor client and Redis client of one worker process"""
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.client = None
+        self.redis = None
+        self.semaphore = None
+        self.pid = None
+        self._lock = threading.Lock()
+
+    def init(self):
+        with self._lock:
+            if self.loop is not None and self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, name="worker-loop", daemon=True)
+            self.thread.start()
+            self.client = AsyncIOMotorClient(
+                MONGO_DB_URL,
+                serverSelectionTimeoutMS=5000,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                io_loop=self.loop
+            )
+            self.redis = aioredis.from_url(REDIS_URL)
+            self.semaphore = asyncio.Semaphore(ASYNC_CONCURRENCY)
+        # Connect once up front instead of pinging in every task. Not waited on:
+        # prefork kills a child that takes longer than worker_proc_alive_timeout
+        # (4s) to report up, and server selection alone may take 5s
+        self.submit(self.client.admin.command('ping')).add_done_callback(self._log_ping)
+
+    def _log_ping(self, future):
+        try:
+            future.result()
+            logger.info(f"Worker {self.pid} connected to MongoDB")
+        except Exception as e:
+            # Tasks will retry the connection through the client's own server selection
+            logger.error(f"Worker {self.pid} could not reach MongoDB: {e}")
+
+    async def _limited(self, coro):
+        async with self.semaphore:
+            return await coro
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop, returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(self._limited(coro), self.loop)
+
+    def close(self):
+        with self._lock:
+            if self.loop is not None and self.pid == os.getpid() and not self.loop.is_closed():
+                if self.client is not None:
+                    self.client.close()
+                if self.redis is not None:
+                    asyncio.run_coroutine_threadsafe(self.redis.close(), self.loop).result(timeout=5)
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.thread.join(timeout=5)
+                self.loop.close()
+            self.loop = self.thread = self.client = self.redis = self.semaphore = self.pid = None
+
+    def ensure(self):
+        # A forked child must never reuse its parent's loop or sockets
+        if self.loop is None or self.pid != os.getpid():
+            self.init()
+
+worker_resources = WorkerResources()
+
+def init_worker_db(**kwargs):
+    """worker_process_init handler"""
+    worker_resources.init()
+
+def close_worker_db(**kwargs):
+    """worker_process_shutdown / worker_shutdown handler"""
+    worker_resources.close()
+
+def get_db():
+    worker_resources.ensure()
+    return worker_resources.client.todo
+
+def get_redis() -> aioredis.Redis:
+    worker_resources.ensure()
+    return worker_resources.redis
+
+def run(coro, timeout: float = None):
+    """Run a coroutine on this process's shared loop and wait for its result"""
+    worker_resources.ensure()
+    if threading.current_thread() is worker_resources.thread:
+        coro.close()
+        raise RuntimeError("run() called from the worker loop, await the coroutine instead")
+    return worker_resources.submit(coro).result(timeout)
@@ -61,13 +61,21 @@ const TodoList = () => {
         return;
       }
 
-      const response = await axios.get(`${config.apiBaseUrl}/todos`, {
-        headers: {
-          'Authorization': `Bearer ${token}`
-        }
-      });
+      // The list endpoint is paginated, follow next_cursor until the last page
+      const collected: Todo[] = [];
+      let cursor: string | null = null;
+      do {
+        const response: { data: { items: Todo[]; next_cursor: string | null } } = await axios.get(`${config.apiBaseUrl}/todos`, {
+          headers: {
+            'Authorization': `Bearer ${token}`
+          },
+          params: cursor ? { after: cursor } : {}
+        });
+        collected.push(...response.data.items);
+        cursor = response.data.next_cursor;
+      } while (cursor);
 
-      setTodos(response.data);
+      setTodos(collected);
       setError(''); // Clear any previous errors
     } catch (err: any) {
       if (err.response && err.response.status === 401) {